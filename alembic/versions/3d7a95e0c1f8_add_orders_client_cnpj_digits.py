@@ -0,0 +1,77 @@
+"""add orders client cnpj digits
+
+Revision ID: 3d7a95e0c1f8
+Revises: e93f1c5a7d24
+Create Date: 2026-10-18 13:04:52.903117
+
+"""
+
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d7a95e0c1f8'
+down_revision: Union[str, None] = 'e93f1c5a7d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# The app adds missing columns and indexes at startup (app/db/schema.py),
+	# so they may already exist
+	bind = op.get_bind()
+	inspector = sa.inspect(bind)
+	columns = {column['name'] for column in inspector.get_columns('orders')}
+	indexes = {index['name'] for index in inspector.get_indexes('orders')}
+	if 'client_cnpj_digits' not in columns:
+		op.add_column(
+			'orders', sa.Column('client_cnpj_digits', sa.String(length=20), nullable=True)
+		)
+
+	# Backfill from the formatted CNPJ, the rows not filled yet
+	orders = sa.table(
+		'orders',
+		sa.column('id', sa.Integer),
+		sa.column('client_cnpj', sa.String),
+		sa.column('client_cnpj_digits', sa.String),
+	)
+	rows = bind.execute(
+		sa.select(orders.c.id, orders.c.client_cnpj).where(
+			orders.c.client_cnpj.isnot(None), orders.c.client_cnpj_digits.is_(None)
+		)
+	).all()
+	values = [
+		{'order_id': order_id, 'digits': re.sub(r'\D', '', cnpj) or None} for order_id, cnpj in rows
+	]
+	update = (
+		orders.update()
+		.where(orders.c.id == sa.bindparam('order_id'))
+		.values(client_cnpj_digits=sa.bindparam('digits'))
+	)
+	for start in range(0, len(values), BATCH_SIZE):
+		bind.execute(update, values[start : start + BATCH_SIZE])
+
+	if 'ix_orders_client_cnpj_created_at' in indexes:
+		op.drop_index('ix_orders_client_cnpj_created_at', table_name='orders')
+	if 'ix_orders_client_cnpj_digits_created_at' not in indexes:
+		op.create_index(
+			'ix_orders_client_cnpj_digits_created_at',
+			'orders',
+			['client_cnpj_digits', 'created_at', 'id'],
+		)
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	op.drop_index('ix_orders_client_cnpj_digits_created_at', table_name='orders')
+	op.create_index(
+		'ix_orders_client_cnpj_created_at', 'orders', ['client_cnpj', 'created_at', 'id']
+	)
+	op.drop_column('orders', 'client_cnpj_digits')
@@ -0,0 +1,83 @@
+"""add orders omie hash
+
+Revision ID: 5a1e7d3c9b62
+Revises: 8f2c6b4d9e1a
+Create Date: 2026-10-18 16:08:43.207615
+
+"""
+
+import hashlib
+import json
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1e7d3c9b62'
+down_revision: Union[str, None] = '8f2c6b4d9e1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+# Same fields and hash as app.models.orders.omie_hash, copied so the migration
+# does not change if the app does
+OMIE_FIELDS = (
+	'client_name',
+	'client_cnpj',
+	'product_code',
+	'product_description',
+	'product_family',
+)
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# The app adds missing columns at startup (app/db/schema.py), so it may
+	# already exist
+	bind = op.get_bind()
+	columns = {column['name'] for column in sa.inspect(bind).get_columns('orders')}
+	if 'omie_hash' not in columns:
+		op.add_column('orders', sa.Column('omie_hash', sa.String(length=40), nullable=True))
+
+	# Backfill from the local rows, which hold the fields copied from Omie, so
+	# the next sync does not rewrite every order. Only the rows not hashed yet
+	# are written
+	orders = sa.table(
+		'orders',
+		sa.column('id', sa.Integer),
+		sa.column('order_number', sa.Integer),
+		sa.column('omie_hash', sa.String),
+		*(sa.column(field, sa.String) for field in OMIE_FIELDS),
+	)
+	rows = bind.execute(
+		sa.select(
+			orders.c.id,
+			orders.c.order_number,
+			orders.c.omie_hash,
+			*(orders.c[f] for f in OMIE_FIELDS),
+		).order_by(orders.c.order_number, orders.c.id)
+	).all()
+	values = []
+	for _, group in groupby(rows, key=lambda row: row.order_number):
+		group = list(group)
+		content = [[row._mapping[field] for field in OMIE_FIELDS] for row in group]
+		digest = hashlib.sha1(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+		values.extend(
+			{'order_id': row.id, 'digest': digest} for row in group if row.omie_hash is None
+		)
+
+	update = (
+		orders.update()
+		.where(orders.c.id == sa.bindparam('order_id'))
+		.values(omie_hash=sa.bindparam('digest'))
+	)
+	for start in range(0, len(values), BATCH_SIZE):
+		bind.execute(update, values[start : start + BATCH_SIZE])
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	op.drop_column('orders', 'omie_hash')
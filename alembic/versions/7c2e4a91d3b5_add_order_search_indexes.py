@@ -0,0 +1,46 @@
+"""add order search indexes
+
+Revision ID: 7c2e4a91d3b5
+Revises: 5886c70609dc
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4a91d3b5'
+down_revision: Union[str, None] = '5886c70609dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# The app creates missing indexes at startup (app/db/schema.py), so they
+	# may already exist
+	indexes = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('orders')}
+	for name, columns in (
+		('ix_orders_client_name_created_at', ['client_name', 'created_at', 'id']),
+		('ix_orders_client_cnpj_created_at', ['client_cnpj', 'created_at', 'id']),
+		('ix_orders_product_code_created_at', ['product_code', 'created_at', 'id']),
+		('ix_orders_order_number_created_at', ['order_number', 'created_at', 'id']),
+		('ix_orders_reader_id_created_at', ['reader_id', 'created_at', 'id']),
+		('ix_orders_workflow_status', ['activated_at', 'shipped_at', 'tested_at', 'mounted_at']),
+	):
+		if name not in indexes:
+			op.create_index(name, 'orders', columns)
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	op.drop_index('ix_orders_workflow_status', table_name='orders')
+	op.drop_index('ix_orders_reader_id_created_at', table_name='orders')
+	op.drop_index('ix_orders_order_number_created_at', table_name='orders')
+	op.drop_index('ix_orders_product_code_created_at', table_name='orders')
+	op.drop_index('ix_orders_client_cnpj_created_at', table_name='orders')
+	op.drop_index('ix_orders_client_name_created_at', table_name='orders')
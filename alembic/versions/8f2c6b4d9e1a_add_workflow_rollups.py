@@ -0,0 +1,91 @@
+"""add workflow rollups
+
+Revision ID: 8f2c6b4d9e1a
+Revises: 3d7a95e0c1f8
+Create Date: 2026-10-18 14:37:26.481530
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c6b4d9e1a'
+down_revision: Union[str, None] = '3d7a95e0c1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps() -> list:
+	return [
+		sa.Column(
+			'created_at',
+			sa.DateTime(timezone=True),
+			server_default=sa.func.now(),
+			nullable=False,
+		),
+		sa.Column(
+			'updated_at',
+			sa.DateTime(timezone=True),
+			server_default=sa.func.now(),
+			nullable=False,
+		),
+	]
+
+
+def _indexes(inspector, table: str) -> set[str]:
+	if not inspector.has_table(table):
+		return set()
+	return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# The app creates missing tables and indexes at startup (app/db/schema.py),
+	# so they may already exist
+	inspector = sa.inspect(op.get_bind())
+	indexes = _indexes(inspector, 'app_state')
+	if not inspector.has_table('app_state'):
+		op.create_table(
+			'app_state',
+			sa.Column('key', sa.String(length=100), nullable=False),
+			sa.Column('value', sa.Text(), nullable=True),
+			*_timestamps(),
+			sa.PrimaryKeyConstraint('key'),
+		)
+	if 'ix_app_state_created_at' not in indexes:
+		op.create_index('ix_app_state_created_at', 'app_state', ['created_at'])
+
+	indexes = _indexes(inspector, 'workflow_rollups')
+	if not inspector.has_table('workflow_rollups'):
+		op.create_table(
+			'workflow_rollups',
+			sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+			sa.Column('day', sa.Date(), nullable=False),
+			sa.Column('stage', sa.String(length=20), nullable=False),
+			sa.Column('dimension', sa.String(length=20), nullable=False),
+			sa.Column('group_value', sa.String(length=255), nullable=False),
+			sa.Column('bucket', sa.Integer(), nullable=False),
+			sa.Column('count', sa.Integer(), nullable=False),
+			*_timestamps(),
+			sa.PrimaryKeyConstraint('id'),
+			sa.UniqueConstraint(
+				'day', 'stage', 'dimension', 'group_value', 'bucket', name='uq_workflow_rollups_key'
+			),
+		)
+	if 'ix_workflow_rollups_day' not in indexes:
+		op.create_index('ix_workflow_rollups_day', 'workflow_rollups', ['day'])
+	if 'ix_workflow_rollups_created_at' not in indexes:
+		op.create_index('ix_workflow_rollups_created_at', 'workflow_rollups', ['created_at'])
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	op.drop_index('ix_workflow_rollups_created_at', table_name='workflow_rollups')
+	op.drop_index('ix_workflow_rollups_day', table_name='workflow_rollups')
+	op.drop_table('workflow_rollups')
+	op.drop_index('ix_app_state_created_at', table_name='app_state')
+	op.drop_table('app_state')
@@ -0,0 +1,60 @@
+"""add order changes
+
+Revision ID: b41d8f2a6c07
+Revises: 7c2e4a91d3b5
+Create Date: 2026-10-18 11:02:17.540318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41d8f2a6c07'
+down_revision: Union[str, None] = '7c2e4a91d3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# The app creates missing tables and indexes at startup (app/db/schema.py),
+	# so they may already exist
+	inspector = sa.inspect(op.get_bind())
+	if inspector.has_table('order_changes'):
+		indexes = {index['name'] for index in inspector.get_indexes('order_changes')}
+	else:
+		indexes = set()
+		op.create_table(
+			'order_changes',
+			sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+			sa.Column('order_id', sa.Integer(), nullable=False),
+			sa.Column('action', sa.String(length=20), nullable=False),
+			sa.Column(
+				'created_at',
+				sa.DateTime(timezone=True),
+				server_default=sa.func.now(),
+				nullable=False,
+			),
+			sa.Column(
+				'updated_at',
+				sa.DateTime(timezone=True),
+				server_default=sa.func.now(),
+				nullable=False,
+			),
+			sa.PrimaryKeyConstraint('id'),
+		)
+	if 'ix_order_changes_order_id' not in indexes:
+		op.create_index('ix_order_changes_order_id', 'order_changes', ['order_id'])
+	if 'ix_order_changes_created_at' not in indexes:
+		op.create_index('ix_order_changes_created_at', 'order_changes', ['created_at'])
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	op.drop_index('ix_order_changes_created_at', table_name='order_changes')
+	op.drop_index('ix_order_changes_order_id', table_name='order_changes')
+	op.drop_table('order_changes')
@@ -0,0 +1,43 @@
+"""add orders fulltext index
+
+Revision ID: e93f1c5a7d24
+Revises: b41d8f2a6c07
+Create Date: 2026-10-18 12:21:05.114872
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e93f1c5a7d24'
+down_revision: Union[str, None] = 'b41d8f2a6c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+	"""Upgrade schema."""
+	# FULLTEXT is MySQL only, other databases search with the in-memory index
+	bind = op.get_bind()
+	if bind.dialect.name != 'mysql':
+		return
+	# The app creates missing indexes at startup (app/db/schema.py)
+	if 'ix_orders_fulltext' in {index['name'] for index in sa.inspect(bind).get_indexes('orders')}:
+		return
+	op.create_index(
+		'ix_orders_fulltext',
+		'orders',
+		['product_description', 'product_family', 'comments'],
+		mysql_prefix='FULLTEXT',
+	)
+
+
+def downgrade() -> None:
+	"""Downgrade schema."""
+	if op.get_bind().dialect.name != 'mysql':
+		return
+	op.drop_index('ix_orders_fulltext', table_name='orders')
@@ -0,0 +1,42 @@
+import asyncio
+import json
+import logging
+import random
+from datetime import datetime, timedelta
+
+from app.core import settings
+from app.services.controller import controller
+from app.services.controller.main import OMIE_LAST_RUN_KEY
+
+
+async def omie_sync():
+	"""
+	Synchronize with Omie every OMIE_SYNC_INTERVAL seconds (0 disables it).
+
+	The interval counts from the end of the last run, manual ones included, plus
+	a random jitter of up to OMIE_SYNC_JITTER seconds so restarts and several
+	instances do not hit Omie at the same moment.
+	"""
+	if not settings.OMIE_SYNC_INTERVAL:
+		logging.info('Scheduled Omie sync disabled (OMIE_SYNC_INTERVAL = 0)')
+		return
+
+	interval = timedelta(seconds=settings.OMIE_SYNC_INTERVAL)
+	while True:
+		last_run = await controller.db.get_state(OMIE_LAST_RUN_KEY)
+		if last_run:
+			run = json.loads(last_run)
+			finished_at = datetime.fromisoformat(run['started_at']) + timedelta(
+				seconds=run['duration_seconds']
+			)
+		else:
+			finished_at = datetime.now()
+		next_run = finished_at + interval
+		next_run += timedelta(seconds=random.uniform(0, settings.OMIE_SYNC_JITTER))
+		controller.next_sync_at = next_run
+
+		await asyncio.sleep(max(0.0, (next_run - datetime.now()).total_seconds()))
+		# A manual sync ran meanwhile: count the interval from its end
+		if await controller.db.get_state(OMIE_LAST_RUN_KEY) != last_run:
+			continue
+		await controller.sincronize_omie(trigger='schedule')
@@ -6,7 +6,8 @@ from .indicator import Indicator
 from smartx_rfid.utils.path import get_frozen_path
 from smartx_rfid.utils import AlertsManager
 from app.db import setup_database
-from .user import get_user, validate_role
+from .user import CurrentUser, get_user, has_role, validate_role
+from .etag import conditional_json
 
 # DEFAULT VARS
 FILES_PATH = get_frozen_path('config')
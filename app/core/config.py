@@ -42,6 +42,21 @@ class Settings:
 		self.STORAGE_DAYS: int = data.get('STORAGE_DAYS', 7)
 		self.APP_KEY: str = data.get('APP_KEY')
 		self.APP_SECRET: str = data.get('APP_SECRET')
+		self.DB_WORKERS: int = data.get('DB_WORKERS', 10)
+		self.LOOKUP_CACHE_TTL: int = data.get('LOOKUP_CACHE_TTL', 60)
+		self.LOOKUP_CACHE_SIZE: int = data.get('LOOKUP_CACHE_SIZE', 128)
+		self.SYNC_BATCH_SIZE: int = data.get('SYNC_BATCH_SIZE', 500)
+		self.OMIE_BASE_URL: str = data.get('OMIE_BASE_URL', 'https://app.omie.com.br/api/v1/')
+		self.OMIE_CONCURRENCY: int = data.get('OMIE_CONCURRENCY', 4)
+		self.OMIE_RATE_LIMIT: float = data.get('OMIE_RATE_LIMIT', 3)
+		self.OMIE_MAX_RETRIES: int = data.get('OMIE_MAX_RETRIES', 5)
+		self.OMIE_SYNC_INTERVAL: int = data.get('OMIE_SYNC_INTERVAL', 3600)
+		self.OMIE_SYNC_JITTER: int = data.get('OMIE_SYNC_JITTER', 300)
+		self.PASSWORD_WORKERS: int = data.get('PASSWORD_WORKERS', 2)
+		self.LOGIN_MAX_ATTEMPTS: int = data.get('LOGIN_MAX_ATTEMPTS', 5)
+		self.LOGIN_MAX_ATTEMPTS_PER_USER: int = data.get('LOGIN_MAX_ATTEMPTS_PER_USER', 50)
+		self.LOGIN_MAX_ATTEMPTS_PER_IP: int = data.get('LOGIN_MAX_ATTEMPTS_PER_IP', 20)
+		self.LOGIN_WINDOW: int = data.get('LOGIN_WINDOW', 300)
 
 	def get_current_settings(self):
 		return {
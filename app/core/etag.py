@@ -0,0 +1,39 @@
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+def make_etag(request: Request, version: str) -> str:
+	"""Strong ETag for the data `version` as seen through this URL (path + query)."""
+	raw = f'{version}|{request.url.path}?{request.url.query}'.encode('utf-8')
+	return f'"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+	"""
+	Weak comparison of If-None-Match against `etag` (RFC 9110 13.1.2).
+
+	The `W/` prefix is ignored so a validator weakened by a proxy or by a
+	compressing layer still matches.
+	"""
+	if not if_none_match:
+		return False
+	if if_none_match.strip() == '*':
+		return True
+	opaque = etag.removeprefix('W/')
+	return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+async def conditional_json(request: Request, version: str, load) -> Response:
+	"""
+	JSONResponse tagged with an ETag, or an empty 304 when the client already has it.
+
+	`load` is only awaited when the data has to be sent, so repeated requests
+	skip both the query and the serialization.
+	"""
+	etag = make_etag(request, version)
+	headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+	if etag_matches(request.headers.get('if-none-match'), etag):
+		return Response(status_code=304, headers=headers)
+	return JSONResponse(content=await load(), headers=headers)
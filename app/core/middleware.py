@@ -1,19 +1,18 @@
-import inspect
 import logging
-import sys
+from fastapi import Request
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_fastapi_instrumentator import Instrumentator
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
 from starlette.middleware.gzip import GZipMiddleware
 from app.core import get_user
 # =====================
-#  AUTO-REGISTRATION
+#  REGISTRATION
 # =====================
 
 
 def setup_middlewares(app):
-	"""Automatically register all BaseHTTPMiddleware subclasses defined in this module"""
+	"""Register the middlewares, the last one added is the outermost"""
 
 	# CORS middleware
 	app.add_middleware(
@@ -24,63 +23,87 @@ def setup_middlewares(app):
 		allow_headers=['*'],
 	)
 
-	# Auto-register custom middlewares
-	current_module = sys.modules[__name__]
-	for name, obj in inspect.getmembers(current_module, inspect.isclass):
-		if issubclass(obj, BaseHTTPMiddleware) and obj is not BaseHTTPMiddleware:
-			app.add_middleware(obj)
-			print(f'[Middleware] Registered: {name}')
+	app.add_middleware(AuthMiddleware)
+	print('[Middleware] Registered: AuthMiddleware')
 
-	app.add_middleware(GZipMiddleware, minimum_size=1000)
+	app.add_middleware(EventStreamGZipMiddleware, minimum_size=1000)
 	Instrumentator().instrument(app).expose(app, include_in_schema=False)
 
 
-class SafeRequestMiddleware(BaseHTTPMiddleware):
+class EventStreamGZipMiddleware(GZipMiddleware):
 	"""
-	Middleware that wraps every request in a try/except block.
-	Returns a JSON error response if any unhandled exception occurs.
+	GZipMiddleware that leaves Server-Sent Events uncompressed.
+	The gzip stream holds small writes in its buffer, so events would not reach the browser.
 	"""
 
-	async def dispatch(self, request, call_next):
+	async def __call__(self, scope, receive, send):
+		if scope['type'] == 'http':
+			accept = Headers(scope=scope).get('accept', '')
+			if 'text/event-stream' in accept:
+				await self.app(scope, receive, send)
+				return
+		await super().__call__(scope, receive, send)
+
+
+class AuthMiddleware:
+	"""
+	Pure ASGI middleware that answers unauthenticated requests and turns any
+	unhandled exception into a JSON error response.
+
+	Requests to the login page and API and to /static pass through. Others
+	need a valid token (see `get_user`): pages redirect to /auth, API routes
+	get 401. Being raw ASGI, it adds no task or stream per request and
+	responses, streaming ones included, go straight to the client.
+	"""
+
+	PUBLIC_PATHS = ('/auth', '/api/v1/auth/login')
+
+	def __init__(self, app):
+		self.app = app
+
+	async def __call__(self, scope, receive, send):
+		if scope['type'] != 'http':
+			await self.app(scope, receive, send)
+			return
+
+		path = scope['path']
+		response_started = False
+
+		async def send_wrapper(message):
+			nonlocal response_started
+			if message['type'] == 'http.response.start':
+				response_started = True
+			await send(message)
+
 		try:
-			response = await call_next(request)
-			return response
+			# Token from the Authorization header or cookies, decoded once for the whole request
+			if (
+				path not in self.PUBLIC_PATHS
+				and not path.startswith('/static')
+				and not get_user(Request(scope))
+			):
+				if path.startswith('/api'):
+					response = JSONResponse(status_code=401, content={'error': 'Not logged in'})
+				else:
+					response = RedirectResponse(url='/auth')
+				await response(scope, receive, send_wrapper)
+				return
+
+			await self.app(scope, receive, send_wrapper)
 		except Exception as e:
 			# Log the error with traceback
 			logging.error(f'[Middleware Error] {type(e).__name__}: {e}', exc_info=True)
+			if response_started:
+				# Too late for an error response, let the server close the connection
+				raise
 
 			# Return JSON error response with safe serialization
-			return JSONResponse(
+			response = JSONResponse(
 				status_code=500,
 				content={
 					'message': str(e),
 					'error_type': type(e).__name__,
-					'path': request.url.path,
+					'path': path,
 				},
 			)
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-	"""Middleware that logs incoming requests and outgoing responses."""
-
-	async def dispatch(self, request, call_next):
-		# Check if the route is 'auth' or 'login'
-		paths = ['/auth', '/api/v1/auth/login']
-		if request.url.path in paths or request.url.path.startswith('/static'):
-			return await call_next(request)
-
-		# Check for token in Authorization header or cookies
-		token = request.cookies.get('Authorization') or request.headers.get('Authorization')
-		if token:
-			if token.startswith('Bearer '):
-				token = token[7:]  # Remove 'Bearer ' prefix
-			user = get_user(request)
-			if user:
-				return await call_next(request)
-
-		# Redirect if the URL does not start with '/api'
-		if not request.url.path.startswith('/api'):
-			return RedirectResponse(url='/auth')
-
-		# Return error response for unauthenticated API requests
-		return JSONResponse(status_code=401, content={'error': 'Not logged in'})
+			await response(scope, receive, send)
@@ -1,23 +1,92 @@
-from fastapi import Request
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated
+
+from fastapi import Depends, Request
+from prometheus_client import Counter
+
 from app.services import auth_manager
 
+TOKEN_CACHE_HITS = Counter('token_cache_hits', 'Auth tokens found already verified')
+TOKEN_CACHE_MISSES = Counter('token_cache_misses', 'Auth tokens verified by signature')
 
-def get_user(request: Request) -> dict:
+
+class TokenCache:
+	"""
+	Thread-safe LRU of verified tokens and their payload.
+
+	A token is only served from here until its `exp` claim, so a hit is
+	exactly what `auth_manager.decode_token` would have returned, without the
+	signature check. The least recently used token is dropped when `maxsize`
+	is reached.
+	"""
+
+	def __init__(self, maxsize: int = 256):
+		self.maxsize = maxsize
+		self._data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def decode(self, token: str) -> dict | None:
+		"""Payload of a valid token, None if it is invalid or expired."""
+		now = time.time()
+		with self._lock:
+			entry = self._data.get(token)
+			if entry is not None:
+				if entry[0] > now:
+					self._data.move_to_end(token)
+					TOKEN_CACHE_HITS.inc()
+					return entry[1]
+				del self._data[token]
+		TOKEN_CACHE_MISSES.inc()
+
+		valid, payload = auth_manager.decode_token(token)
+		if not valid:
+			return None
+		with self._lock:
+			self._data[token] = (payload['exp'], payload)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+		return payload
+
+
+token_cache = TokenCache()
+
+
+def get_token(request: Request) -> str | None:
+	"""Token of the request, from the Authorization cookie or header."""
 	token = request.cookies.get('Authorization') or request.headers.get('Authorization')
-	valid = False
-	user = None
-	if token:
-		if token.startswith('Bearer '):
-			token = token[7:]  # Remove 'Bearer ' prefix
-		valid, user = auth_manager.decode_token(token)
-	return user if valid else None
+	if token and token.startswith('Bearer '):
+		token = token[7:]  # Remove 'Bearer ' prefix
+	return token or None
 
 
-def validate_role(request: Request, required_role: str | list) -> bool:
-	user = get_user(request)
+def get_user(request: Request) -> dict:
+	"""
+	Payload of the request's token, None if it has no valid one.
+
+	Decoded once per request and kept on `request.state`, which the middlewares
+	and the route share, so later calls are free. Can be used as a dependency,
+	see `CurrentUser`.
+	"""
+	if not hasattr(request.state, 'user'):
+		token = get_token(request)
+		request.state.user = token_cache.decode(token) if token else None
+	return request.state.user
+
+
+# Route parameter with the logged user: `async def route(user: CurrentUser)`
+CurrentUser = Annotated[dict | None, Depends(get_user)]
+
+
+def has_role(user: dict | None, required_role: str | list) -> bool:
 	if not user:
 		return False
 	roles = user.get('roles', [])
 	if isinstance(required_role, str):
 		return required_role in roles
 	return any(role in roles for role in required_role)
+
+
+def validate_role(request: Request, required_role: str | list) -> bool:
+	return has_role(get_user(request), required_role)
@@ -1,6 +1,7 @@
 from smartx_rfid.db import DatabaseManager
 import logging
 from app.models import get_all_models
+from app.db.schema import ensure_schema
 
 
 def setup_database(database_url: str = None) -> DatabaseManager:
@@ -19,6 +20,9 @@ def setup_database(database_url: str = None) -> DatabaseManager:
 	logging.info('Creating tables...')
 	db_manager.create_tables()
 
+	logging.info('Updating existing tables...')
+	ensure_schema(db_manager, models[0].metadata)
+
 	logging.info('DatabaseManager setup complete.')
 
 	return db_manager
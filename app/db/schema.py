@@ -0,0 +1,62 @@
+"""
+Brings the tables of an existing database up to the registered models.
+
+`create_tables` (create_all) only creates the tables that are missing, so a
+column or index added to a model later never reaches a database created
+before it. `ensure_schema` runs right after it, on every start, and adds:
+
+- the missing columns, which must be nullable or have a server default. A
+  column whose `info` has a `backfill` callable gets it called with the
+  connection once added, to fill the rows written before it existed
+- the missing indexes, honouring `ddl_if` (e.g. MySQL-only indexes)
+
+It never drops or alters anything. The Alembic revisions in alembic/versions
+make the same changes and skip what already exists, so `alembic upgrade head`
+is safe before or after a start.
+"""
+
+import logging
+
+from sqlalchemy import MetaData, inspect
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from smartx_rfid.db import DatabaseManager
+
+
+def ensure_schema(db_manager: DatabaseManager, metadata: MetaData):
+	with db_manager.get_session() as session:
+		connection = session.connection()
+		inspector = inspect(connection)
+		existing = set(inspector.get_table_names())
+		preparer = connection.dialect.identifier_preparer
+
+		for table in metadata.sorted_tables:
+			if table.name not in existing:
+				continue
+
+			columns = {column['name'] for column in inspector.get_columns(table.name)}
+			for column in table.columns:
+				if column.name in columns:
+					continue
+				if not column.nullable and column.server_default is None:
+					logging.error(
+						f'Column {table.name}.{column.name} is missing and cannot be added '
+						'automatically, run `alembic upgrade head`'
+					)
+					continue
+				logging.info(f'Adding column {table.name}.{column.name}')
+				spec = CreateColumn(column).compile(dialect=connection.dialect)
+				connection.exec_driver_sql(
+					f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}'
+				)
+				backfill = column.info.get('backfill')
+				if backfill:
+					logging.info(f'Backfilling {table.name}.{column.name}')
+					backfill(connection)
+
+			indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+			for index in table.indexes:
+				create = CreateIndex(index)
+				# False when the index's ddl_if excludes this database
+				if index.name not in indexes and create._should_execute(index, connection):
+					logging.info(f'Creating index {index.name}')
+					connection.execute(create)
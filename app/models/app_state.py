@@ -0,0 +1,15 @@
+"""
+Key/value store for small pieces of application state that must survive a
+restart, such as the watermarks of incremental jobs.
+"""
+
+from sqlalchemy import Column, String, Text
+
+from smartx_rfid.models.mixin import Base, BaseMixin
+
+
+class AppState(Base, BaseMixin):
+	__tablename__ = 'app_state'
+
+	key = Column(String(100), primary_key=True)
+	value = Column(Text, nullable=True)
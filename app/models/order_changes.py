@@ -0,0 +1,21 @@
+"""
+Change log of the `orders` table.
+
+Every write done through ControllerDb appends one row per touched order. The
+autoincrement id is a monotonic version: clients keep the last one they saw and
+ask `/api/v1/orders/changes?since=<version>` for what changed after it.
+"""
+
+from sqlalchemy import Column, Integer, String
+
+from smartx_rfid.models.mixin import Base, BaseMixin
+
+
+class OrderChanges(Base, BaseMixin):
+	__tablename__ = 'order_changes'
+
+	# Primary key, also the change version
+	id = Column(Integer, primary_key=True, autoincrement=True)
+
+	order_id = Column(Integer, nullable=False, index=True)
+	action = Column(String(20), nullable=False)
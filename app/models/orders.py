@@ -0,0 +1,136 @@
+"""
+Local extensions of the `orders` table from smartx_rfid.models.orders.
+
+Composite indexes backing the order search (`/api/v1/orders/search`): each one
+starts with an equality filter and ends with the keyset sort columns so a
+filtered page is read straight from the index.
+
+`client_cnpj_digits` is the CNPJ without punctuation, filled in on every insert
+and update, so CNPJ lookups match whatever the formatting and use a compact
+index. Rows written before the column existed are filled in when
+`app.db.schema.ensure_schema` adds it.
+
+`omie_hash` is a hash of the Omie fields of all the rows of an order (see
+`omie_hash()`), so a sync only rewrites the orders that changed in Omie.
+Existing orders are hashed from their local rows when the column is added.
+
+`ix_orders_fulltext` backs the full-text search (`/api/v1/orders/fulltext`) and
+only exists on MySQL; other databases use ControllerDb's in-memory index.
+"""
+
+import hashlib
+import json
+import re
+from itertools import groupby
+
+from sqlalchemy import Column, Index, String, bindparam, event, select
+
+from smartx_rfid.models.orders import Orders
+
+
+def cnpj_digits(value) -> str | None:
+	"""Digits of a CNPJ ('12.345.678/0001-90' -> '12345678000190'), None if it has none."""
+	digits = re.sub(r'\D', '', str(value)) if value else ''
+	return digits or None
+
+
+# Rows per UPDATE of the backfills
+BACKFILL_BATCH_SIZE = 1000
+
+
+def _backfill_cnpj_digits(connection):
+	table = Orders.__table__
+	rows = connection.execute(
+		select(table.c.id, table.c.client_cnpj).where(
+			table.c.client_cnpj.isnot(None), table.c.client_cnpj_digits.is_(None)
+		)
+	).all()
+	values = [{'order_id': order_id, 'digits': cnpj_digits(cnpj)} for order_id, cnpj in rows]
+	update = (
+		table.update()
+		.where(table.c.id == bindparam('order_id'))
+		.values(client_cnpj_digits=bindparam('digits'))
+	)
+	for start in range(0, len(values), BACKFILL_BATCH_SIZE):
+		connection.execute(update, values[start : start + BACKFILL_BATCH_SIZE])
+
+
+Orders.client_cnpj_digits = Column(
+	String(20), nullable=True, info={'backfill': _backfill_cnpj_digits}
+)
+
+# Columns copied from Omie, in the order hashed by `omie_hash`
+OMIE_FIELDS = (
+	'client_name',
+	'client_cnpj',
+	'product_code',
+	'product_description',
+	'product_family',
+)
+
+
+def omie_hash(rows: list[dict]) -> str:
+	"""SHA-1 of the OMIE_FIELDS of the rows of one order, in order."""
+	content = [[row.get(field) for field in OMIE_FIELDS] for row in rows]
+	return hashlib.sha1(json.dumps(content, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _backfill_omie_hash(connection):
+	# The local rows hold the fields copied from Omie, so the next sync does
+	# not rewrite every order
+	table = Orders.__table__
+	rows = connection.execute(
+		select(table.c.id, table.c.order_number, *(table.c[field] for field in OMIE_FIELDS))
+		.where(table.c.order_number.isnot(None))
+		.order_by(table.c.order_number, table.c.id)
+	).all()
+	values = []
+	for _, group in groupby(rows, key=lambda row: row.order_number):
+		group = [row._asdict() for row in group]
+		digest = omie_hash(group)
+		values.extend({'order_id': row['id'], 'digest': digest} for row in group)
+	update = (
+		table.update()
+		.where(table.c.id == bindparam('order_id'))
+		.values(omie_hash=bindparam('digest'))
+	)
+	for start in range(0, len(values), BACKFILL_BATCH_SIZE):
+		connection.execute(update, values[start : start + BACKFILL_BATCH_SIZE])
+
+
+Orders.omie_hash = Column(String(40), nullable=True, info={'backfill': _backfill_omie_hash})
+
+
+@event.listens_for(Orders, 'before_insert')
+@event.listens_for(Orders, 'before_update')
+def _fill_cnpj_digits(mapper, connection, target):
+	target.client_cnpj_digits = cnpj_digits(target.client_cnpj)
+
+
+ORDER_SEARCH_INDEXES = [
+	Index('ix_orders_client_name_created_at', Orders.client_name, Orders.created_at, Orders.id),
+	Index(
+		'ix_orders_client_cnpj_digits_created_at',
+		Orders.client_cnpj_digits,
+		Orders.created_at,
+		Orders.id,
+	),
+	Index('ix_orders_product_code_created_at', Orders.product_code, Orders.created_at, Orders.id),
+	Index('ix_orders_order_number_created_at', Orders.order_number, Orders.created_at, Orders.id),
+	Index('ix_orders_reader_id_created_at', Orders.reader_id, Orders.created_at, Orders.id),
+	Index(
+		'ix_orders_workflow_status',
+		Orders.activated_at,
+		Orders.shipped_at,
+		Orders.tested_at,
+		Orders.mounted_at,
+	),
+]
+
+ORDER_FULLTEXT_INDEX = Index(
+	'ix_orders_fulltext',
+	Orders.product_description,
+	Orders.product_family,
+	Orders.comments,
+	mysql_prefix='FULLTEXT',
+).ddl_if(dialect='mysql')
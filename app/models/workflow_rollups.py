@@ -0,0 +1,35 @@
+"""
+Daily rollups of the product order workflow.
+
+One row per (day, stage, dimension, group, dwell bucket) with the number of
+orders that reached `stage` that day. `dimension` is what the orders are
+grouped by (product_family or reader_type) and `bucket` is the index in
+`app.services.controller.analytics.DWELL_BUCKETS` of the time the order waited
+since the previous stage (-1 when unknown). Throughput is the sum over the
+buckets; dwell percentiles come from the bucket counts.
+
+Rows are only ever incremented by ControllerDb.refresh_workflow_rollups, which
+reads the orders that changed stage since the watermark stored in `app_state`.
+"""
+
+from sqlalchemy import Column, Date, Integer, String, UniqueConstraint
+
+from smartx_rfid.models.mixin import Base, BaseMixin
+
+
+class WorkflowRollups(Base, BaseMixin):
+	__tablename__ = 'workflow_rollups'
+	__table_args__ = (
+		UniqueConstraint(
+			'day', 'stage', 'dimension', 'group_value', 'bucket', name='uq_workflow_rollups_key'
+		),
+	)
+
+	id = Column(Integer, primary_key=True, autoincrement=True)
+
+	day = Column(Date, nullable=False, index=True)
+	stage = Column(String(20), nullable=False)
+	dimension = Column(String(20), nullable=False)
+	group_value = Column(String(255), nullable=False, default='')
+	bucket = Column(Integer, nullable=False)
+	count = Column(Integer, nullable=False, default=0)
@@ -11,6 +11,7 @@ from app.core import settings
 from smartx_rfid.utils import delayed_function
 from app.core.utils import restart_application, exit_application
 from app.core import alerts_manager
+from app.services.controller import controller
 
 router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
@@ -71,3 +72,11 @@ async def get_version():
 @router.get('/get_alerts', summary='Get current alerts')
 async def get_alerts():
 	return JSONResponse(content=alerts_manager.get_alerts())
+
+
+@router.get(
+	'/get_db_pool_metrics',
+	summary='Get database worker pool and connection pool metrics',
+)
+async def get_db_pool_metrics():
+	return JSONResponse(content=controller.db.get_metrics())
@@ -1,4 +1,5 @@
 import logging
+import math
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
@@ -7,6 +8,7 @@ from smartx_rfid.utils.path import get_prefix_from_path
 from app.schemas.auth import AuthSchema, AddUserSchema
 from app.services import auth_manager
 from app.services.controller import controller
+from app.services.login import login_limiter, password_hasher
 from app.core import get_user, validate_role
 
 router_prefix = get_prefix_from_path(__file__)
@@ -15,12 +17,25 @@ router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 
 @router.post('/login')
 async def login(request: Request, auth_data: AuthSchema):
+	ip = request.client.host if request.client else 'unknown'
+	retry_after = login_limiter.retry_after(auth_data.username, ip)
+	if retry_after:
+		seconds = math.ceil(retry_after)
+		logging.warning(f'Login of {auth_data.username} from {ip} blocked for {seconds}s')
+		return JSONResponse(
+			status_code=429,
+			content={'error': f'Muitas tentativas de login, tente novamente em {seconds} s'},
+			headers={'Retry-After': str(seconds)},
+		)
 	try:
-		user: dict = controller.db_manager.get_user_by_username(auth_data.username)
+		user: dict = await controller.db.get_user_by_username(auth_data.username)
 		if not user:
+			login_limiter.failed(auth_data.username, ip)
 			return JSONResponse(status_code=401, content={'error': 'Usuário não encontrado'})
-		if not auth_manager.verify_password(auth_data.password, user.get('password_hash')):
+		if not await password_hasher.verify(auth_data.password, user.get('password_hash')):
+			login_limiter.failed(auth_data.username, ip)
 			return JSONResponse(status_code=401, content={'error': 'Senha inválida'})
+		login_limiter.succeeded(auth_data.username, ip)
 		# Generate and return a token or session here
 		token = auth_manager.create_token(
 			{
@@ -75,9 +90,9 @@ async def add_user(request: Request, auth_data: AddUserSchema):
 	try:
 		username = auth_data.username
 		password = auth_data.password
-		password_hash = auth_manager.hash_password(password)
+		password_hash = await password_hasher.hash(password)
 		role = auth_data.role
-		success, id = controller.db_manager.add_user(
+		success, id = await controller.db.add_user(
 			username=username, password_hash=password_hash, role=role
 		)
 		if not success:
@@ -106,8 +121,8 @@ async def change_password(request: Request, user_id: int, new_password: str):
 				status_code=403,
 				content={'error': 'Proibido: Você só pode alterar sua própria senha'},
 			)
-		new_password_hash = auth_manager.hash_password(new_password)
-		success = controller.db_manager.update_user(user_id, password_hash=new_password_hash)
+		new_password_hash = await password_hasher.hash(new_password)
+		success = await controller.db.update_user(user_id, password_hash=new_password_hash)
 		if not success:
 			return JSONResponse(status_code=400, content={'error': 'Erro ao alterar senha'})
 		return JSONResponse(status_code=200, content={'message': 'Senha alterada com sucesso'})
@@ -132,7 +147,7 @@ async def change_role(request: Request, user_id: int, new_role: str):
 				status_code=403,
 				content={'error': 'Proibido: Apenas administradores podem alterar funções'},
 			)
-		success = controller.db_manager.update_user(user_id, role=new_role)
+		success = await controller.db.update_user(user_id, role=new_role)
 		if not success:
 			return JSONResponse(status_code=400, content={'error': 'Erro ao alterar função'})
 		return JSONResponse(status_code=200, content={'message': 'Função alterada com sucesso'})
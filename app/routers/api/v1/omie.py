@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from fastapi.responses import JSONResponse
 from smartx_rfid.utils.path import get_prefix_from_path
 from app.services.controller import controller
@@ -11,11 +11,29 @@ router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 @router.post(
 	'/sincronize_omie',
 	summary='Synchronize all data with Omie',
+	description='Starts a background sync and returns its job (202); poll `/sync_jobs/{job_id}` for progress. Fetches only the orders changed in Omie since the last successful sync, `full=true` reconciles against every order in Omie. If a sync is already running its job is returned instead.',
 )
-async def sincronize_omie():
-	success, data = await controller.sincronize_omie()
-	if success:
-		return JSONResponse(content=data)
-	return JSONResponse(
-		content={'message': f'Erro ao sincronizar com Omie: {data}'}, status_code=400
-	)
+async def sincronize_omie(full: bool = Query(False)):
+	job = controller.start_omie_sync(full=full)
+	return JSONResponse(content=job.to_dict(), status_code=202)
+
+
+@router.get(
+	'/sync_jobs/{job_id}',
+	summary='Progress of an Omie sync job',
+	description='Phase (fetching, comparing, inserting, updating, done, failed), pages fetched, rows inserted and updated, error count and ETA in seconds of the current phase. `result` holds the sync summary once done.',
+)
+async def sync_job(job_id: str):
+	job = controller.get_sync_job(job_id)
+	if job is None:
+		return JSONResponse(content={'message': 'Sincronização não encontrada'}, status_code=404)
+	return JSONResponse(content=job.to_dict())
+
+
+@router.get(
+	'/sync_status',
+	summary='Status of the Omie synchronization',
+	description='Whether a sync is running, when the next scheduled sync is due and the duration and outcome of the last one.',
+)
+async def sync_status():
+	return JSONResponse(content=await controller.get_sync_status())
@@ -1,9 +1,15 @@
-from datetime import datetime
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+import asyncio
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from smartx_rfid.utils.path import get_prefix_from_path
+from app.schemas.controller import BulkReaderAssignment, BulkTransition, OrderFilter, OrderSearch
 from app.services.controller import controller
-from app.core import get_user, validate_role
+from app.core import CurrentUser, conditional_json, has_role, validate_role
 
 
 router_prefix = get_prefix_from_path(__file__)
@@ -15,8 +21,203 @@ router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 	'/get_all_orders',
 	summary='Get all product orders',
 )
-async def get_all_orders():
-	return JSONResponse(content=controller.db_manager.get_product_orders())
+async def get_all_orders(request: Request):
+	version = await controller.db.get_orders_version()
+	return await conditional_json(request, version, controller.db.get_product_orders)
+
+
+@router.get(
+	'/get_orders_page',
+	summary='Get product orders with cursor (keyset) pagination',
+	description='Returns up to `limit` orders sorted by `sort` (id or created_at) and a `next_cursor` to fetch the following page.',
+)
+async def get_orders_page(
+	request: Request,
+	limit: int = Query(50, ge=1, le=500),
+	cursor: str | None = Query(None),
+	sort: str = Query('id'),
+	order: str = Query('desc', pattern='^(asc|desc)$'),
+):
+	try:
+		version = await controller.db.get_orders_version()
+		return await conditional_json(
+			request,
+			version,
+			lambda: controller.db.get_product_orders_page(
+				limit=limit, cursor=cursor, sort=sort, descending=order == 'desc'
+			),
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Paginação inválida: {e}'})
+
+
+@router.get(
+	'/search',
+	summary='Search product orders combining any filters',
+	description='Combines client, CNPJ, product code, order number, reader, reader type, status and date range filters in a single paginated query.',
+)
+async def search_orders(
+	request: Request,
+	filters: Annotated[OrderSearch, Depends()],
+	limit: int = Query(50, ge=1, le=500),
+	cursor: str | None = Query(None),
+	sort: str = Query('id'),
+	order: str = Query('desc', pattern='^(asc|desc)$'),
+):
+	try:
+		version = await controller.db.get_orders_version()
+		return await conditional_json(
+			request,
+			version,
+			lambda: controller.db.get_product_orders_page(
+				filters=filters.model_dump(exclude_none=True),
+				limit=limit,
+				cursor=cursor,
+				sort=sort,
+				descending=order == 'desc',
+			),
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Busca inválida: {e}'})
+
+
+@router.get(
+	'/stats',
+	summary='Count product orders per workflow stage',
+	description='Returns the total and the number of orders in each stage (pendente, montado, testado, enviado, ativado), optionally filtered.',
+)
+async def get_orders_stats(request: Request, filters: Annotated[OrderFilter, Depends()]):
+	try:
+		version = await controller.db.get_orders_version()
+		return await conditional_json(
+			request,
+			version,
+			lambda: controller.db.get_product_order_stats(filters.model_dump(exclude_none=True)),
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Filtro inválido: {e}'})
+
+
+@router.get(
+	'/workflow_analytics',
+	summary='Workflow throughput and stage dwell times',
+	description='Per-day number of orders that reached each stage (mount, test, ship, activate) and the p50/p95 time in seconds they waited since the previous stage, grouped by `product_family` or `reader_type`. Defaults to the last 30 days.',
+)
+async def get_workflow_analytics(
+	group_by: str = Query('product_family'),
+	start_date: date | None = None,
+	end_date: date | None = None,
+):
+	try:
+		return JSONResponse(
+			content=await controller.db.get_workflow_analytics(group_by, start_date, end_date)
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Agrupamento inválido: {e}'})
+
+
+@router.get(
+	'/changes',
+	summary='Get product orders changed since a version or a timestamp',
+	description='`since` is the `version` returned by the previous call (0 for all changes) or an ISO timestamp. Returns the changed orders, the deleted IDs and the new `version`.',
+)
+async def get_orders_changes(
+	since: str = Query('0'),
+	limit: int = Query(1000, ge=1, le=5000),
+):
+	try:
+		if since.isdigit():
+			version = int(since)
+		else:
+			timestamp = datetime.fromisoformat(since.replace('Z', '+00:00'))
+			version = await controller.db.get_order_changes_version_at(timestamp)
+	except ValueError:
+		return JSONResponse(
+			status_code=400,
+			content={
+				'error': 'Parâmetro since inválido. Use a versão retornada pela API ou uma data ISO.'
+			},
+		)
+	return JSONResponse(content=await controller.db.get_product_order_changes(version, limit))
+
+
+@router.get(
+	'/events',
+	summary='Stream product order changes (Server-Sent Events)',
+	description='Sends an `order_changed` event with `action` and the new `order` state after workflow transitions, reader assignments, comments and Omie sync inserts. A `resync` event means the client fell behind and must reload.',
+)
+async def order_events(request: Request):
+	queue = controller.order_events.subscribe()
+
+	async def stream():
+		try:
+			yield 'retry: 5000\n\n'
+			while True:
+				try:
+					message = await asyncio.wait_for(queue.get(), timeout=15)
+				except asyncio.TimeoutError:
+					if await request.is_disconnected():
+						break
+					yield ': keepalive\n\n'
+					continue
+				data = json.dumps(message['data'], default=str)
+				yield f'id: {message["id"]}\nevent: {message["event"]}\ndata: {data}\n\n'
+		finally:
+			controller.order_events.unsubscribe(queue)
+
+	return StreamingResponse(
+		stream(),
+		media_type='text/event-stream',
+		headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+	)
+
+
+def _csv_rows(rows: list[list]) -> str:
+	buffer = io.StringIO()
+	csv.writer(buffer).writerows(rows)
+	return buffer.getvalue()
+
+
+@router.get(
+	'/export',
+	summary='Stream product orders as NDJSON or CSV',
+	description='Streams every order matching the filters (same as `/search`) ordered by id, read from a server-side cursor in batches, so memory use does not grow with the number of rows.',
+)
+async def export_orders(
+	filters: Annotated[OrderSearch, Depends()],
+	format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+	batch_size: int = Query(1000, ge=100, le=10000),
+):
+	try:
+		batches = await controller.db.iter_product_orders(
+			filters.model_dump(exclude_none=True), batch_size
+		)
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Filtro inválido: {e}'})
+	fields = controller.db_manager.order_fields()
+
+	async def stream():
+		try:
+			if format == 'csv':
+				yield _csv_rows([fields])
+			while True:
+				batch = await controller.db.run(next, batches, None)
+				if batch is None:
+					break
+				if format == 'csv':
+					yield _csv_rows([[order.get(field) for field in fields] for order in batch])
+				else:
+					yield ''.join(json.dumps(order, default=str) + '\n' for order in batch)
+		finally:
+			await controller.db.run(batches.close)
+
+	if format == 'csv':
+		return StreamingResponse(
+			stream(),
+			media_type='text/csv',
+			headers={'Content-Disposition': 'attachment; filename="orders.csv"'},
+		)
+	return StreamingResponse(stream(), media_type='application/x-ndjson')
 
 
 @router.get(
@@ -24,7 +225,7 @@ async def get_all_orders():
 	summary='Get a product order by its ID',
 )
 async def get_order_by_id(order_id: int):
-	return JSONResponse(content=controller.db_manager.get_product_order(order_id))
+	return JSONResponse(content=await controller.db.get_product_order(order_id))
 
 
 @router.get(
@@ -34,7 +235,7 @@ async def get_order_by_id(order_id: int):
 async def get_product_orders_by_ids(ids: str):
 	try:
 		order_ids = [int(id.strip()) for id in ids.split(',')]
-		orders = controller.db_manager.get_product_orders_by_ids(order_ids)
+		orders = await controller.db.get_product_orders_by_ids(order_ids)
 		return JSONResponse(content=orders)
 	except ValueError:
 		return JSONResponse(
@@ -50,17 +251,16 @@ async def get_product_orders_by_ids(ids: str):
 	summary='Get product orders by client name',
 )
 async def get_product_orders_by_client(client_name: str):
-	return JSONResponse(content=controller.db_manager.get_product_orders_by_client(client_name))
+	return JSONResponse(content=await controller.db.get_product_orders_by_client(client_name))
 
 
 @router.get(
 	'/get_product_orders_by_cnpj/{cnpj}',
 	summary='Get product orders by client CNPJ',
+	description='Matches on the CNPJ digits only, so punctuation (or the `|` the frontend uses in place of `/`) does not matter.',
 )
 async def get_product_orders_by_cnpj(cnpj: str):
-	# Restaurar barras que foram substituídas por pipes no frontend
-	cnpj_decoded = cnpj.replace('|', '/')
-	return JSONResponse(content=controller.db_manager.get_product_orders_by_cnpj(cnpj_decoded))
+	return JSONResponse(content=await controller.db.get_product_orders_by_cnpj(cnpj))
 
 
 @router.get(
@@ -69,7 +269,7 @@ async def get_product_orders_by_cnpj(cnpj: str):
 )
 async def get_product_orders_by_product_code(product_code: str):
 	return JSONResponse(
-		content=controller.db_manager.get_product_orders_by_product_code(product_code)
+		content=await controller.db.get_product_orders_by_product_code(product_code)
 	)
 
 
@@ -79,7 +279,7 @@ async def get_product_orders_by_product_code(product_code: str):
 )
 async def get_product_orders_by_order_number(order_number: str):
 	return JSONResponse(
-		content=controller.db_manager.get_product_orders_by_order_number(order_number)
+		content=await controller.db.get_product_orders_by_order_number(order_number)
 	)
 
 
@@ -89,7 +289,7 @@ async def get_product_orders_by_order_number(order_number: str):
 )
 async def get_product_orders_by_reader_type_name(reader_type_name: str):
 	return JSONResponse(
-		content=controller.db_manager.get_product_orders_by_reader_type_name(reader_type_name)
+		content=await controller.db.get_product_orders_by_reader_type_name(reader_type_name)
 	)
 
 
@@ -101,7 +301,7 @@ async def get_product_orders_by_date(start_date: str, end_date: str, field: str)
 	try:
 		start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
 		end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-		orders = controller.db_manager.get_product_orders_by_date(start_dt, end_dt, field)
+		orders = await controller.db.get_product_orders_by_date(start_dt, end_dt, field)
 		return JSONResponse(content=orders)
 	except (ValueError, TypeError):
 		return JSONResponse(
@@ -117,14 +317,14 @@ async def get_product_orders_by_date(start_date: str, end_date: str, field: str)
 	summary='Get product orders by reader serial number',
 )
 async def get_product_orders_by_reader_serial(serial_number: str):
-	reader = controller.db_manager.get_reader_by_serial(serial_number)
+	reader = await controller.db.get_reader_by_serial(serial_number)
 	if reader is None:
 		return JSONResponse(
 			status_code=404,
 			content={'error': 'Leitor não encontrado com o serial number fornecido.'},
 		)
 	return JSONResponse(
-		content=controller.db_manager.get_product_orders_by_reader(
+		content=await controller.db.get_product_orders_by_reader(
 			reader.get('id') if reader.get('id') else None
 		)
 	)
@@ -135,7 +335,7 @@ async def get_product_orders_by_reader_serial(serial_number: str):
 	summary='Get product orders by reader ID',
 )
 async def get_product_orders_by_reader(reader_id: int):
-	return JSONResponse(content=controller.db_manager.get_product_orders_by_reader(reader_id))
+	return JSONResponse(content=await controller.db.get_product_orders_by_reader(reader_id))
 
 
 @router.put(
@@ -149,20 +349,55 @@ async def add_reader_to_product_order(request: Request, order_id: int, reader_id
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 
-	success, msg = controller.db_manager.add_reader_to_product_order(order_id, reader_id)
+	success, msg = await controller.db.add_reader_to_product_order(order_id, reader_id)
 	if success:
 		return JSONResponse(content={'message': 'Leitor adicionado ao pedido com sucesso'})
 	else:
 		return JSONResponse(status_code=400, content={'error': msg})
 
 
+@router.put(
+	'/add_readers_to_product_orders',
+	summary='Assign many readers to product orders at once',
+	description='Send `assignments` with (order_id, reader_id) pairs, or `order_number` and `reader_type_id` to fill the items of an order with available readers of that type. All or nothing.',
+)
+async def add_readers_to_product_orders(request: Request, data: BulkReaderAssignment):
+	if not validate_role(request, ['admin', 'dev', 'assign']):
+		return JSONResponse(
+			status_code=403,
+			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
+		)
+
+	if data.assignments:
+		success, result = await controller.db.bulk_add_readers_to_product_orders(
+			[(item.order_id, item.reader_id) for item in data.assignments]
+		)
+	elif data.order_number is not None and data.reader_type_id is not None:
+		success, result = await controller.db.assign_available_readers(
+			data.order_number, data.reader_type_id, data.quantity
+		)
+	else:
+		return JSONResponse(
+			status_code=400,
+			content={'error': 'Informe as atribuições ou o número do pedido e o tipo de leitor.'},
+		)
+
+	if success:
+		return JSONResponse(
+			content={'message': f'{len(result)} leitores adicionados', 'assigned': result}
+		)
+	else:
+		return JSONResponse(
+			status_code=400, content={'error': 'Nenhum leitor foi atribuído', 'details': result}
+		)
+
+
 @router.post(
 	'/add_comment_to_product_order/{order_id}/{comment}',
 	summary='Add a comment to a product order',
 )
-async def add_comment_to_product_order(request: Request, order_id: int, comment: str):
-	user = get_user(request)
-	success, msg = controller.db_manager.add_comment_to_product_order(
+async def add_comment_to_product_order(order_id: int, comment: str, user: CurrentUser):
+	success, msg = await controller.db.add_comment_to_product_order(
 		order_id, comment, user.get('username') if user else 'Unknown'
 	)
 	if success:
@@ -176,14 +411,13 @@ async def add_comment_to_product_order(request: Request, order_id: int, comment:
 	'/product_order_mount/{order_id}',
 	summary='Mark a product order as mounted',
 )
-async def product_order_mount(request: Request, order_id: int):
-	if not validate_role(request, ['admin', 'dev', 'mount']):
+async def product_order_mount(order_id: int, user: CurrentUser):
+	if not has_role(user, ['admin', 'dev', 'mount']):
 		return JSONResponse(
 			status_code=403,
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
-	user = get_user(request)
-	success, msg = controller.db_manager.product_order_mount(
+	success, msg = await controller.db.product_order_mount(
 		order_id, user.get('user_id') if user else None
 	)
 	if success:
@@ -196,14 +430,13 @@ async def product_order_mount(request: Request, order_id: int):
 	'/product_order_test/{order_id}',
 	summary='Mark a product order as tested',
 )
-async def product_order_test(request: Request, order_id: int):
-	if not validate_role(request, ['admin', 'dev', 'test']):
+async def product_order_test(order_id: int, user: CurrentUser):
+	if not has_role(user, ['admin', 'dev', 'test']):
 		return JSONResponse(
 			status_code=403,
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
-	user = get_user(request)
-	success, msg = controller.db_manager.product_order_test(
+	success, msg = await controller.db.product_order_test(
 		order_id, user.get('user_id') if user else None
 	)
 	if success:
@@ -216,14 +449,13 @@ async def product_order_test(request: Request, order_id: int):
 	'/product_order_ship/{order_id}',
 	summary='Mark a product order as shipped',
 )
-async def product_order_ship(request: Request, order_id: int):
-	if not validate_role(request, ['admin', 'dev', 'ship']):
+async def product_order_ship(order_id: int, user: CurrentUser):
+	if not has_role(user, ['admin', 'dev', 'ship']):
 		return JSONResponse(
 			status_code=403,
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
-	user = get_user(request)
-	success, msg = controller.db_manager.product_order_ship(
+	success, msg = await controller.db.product_order_ship(
 		order_id, user.get('user_id') if user else None
 	)
 	if success:
@@ -236,14 +468,13 @@ async def product_order_ship(request: Request, order_id: int):
 	'/product_order_activate/{order_id}',
 	summary='Mark a product order as activated',
 )
-async def product_order_activate(request: Request, order_id: int):
-	if not validate_role(request, ['admin', 'dev', 'activate']):
+async def product_order_activate(order_id: int, user: CurrentUser):
+	if not has_role(user, ['admin', 'dev', 'activate']):
 		return JSONResponse(
 			status_code=403,
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
-	user = get_user(request)
-	success, msg = controller.db_manager.product_order_activate(
+	success, msg = await controller.db.product_order_activate(
 		order_id, user.get('user_id') if user else None
 	)
 	if success:
@@ -252,13 +483,40 @@ async def product_order_activate(request: Request, order_id: int):
 		return JSONResponse(status_code=400, content={'error': msg})
 
 
+@router.put(
+	'/product_order_bulk_transition',
+	summary='Move many product orders to the same workflow stage',
+	description='Applies mount, test, ship or activate to every order ID in one transaction and returns the result of each order. Requires the same role as the single-order route.',
+)
+async def product_order_bulk_transition(data: BulkTransition, user: CurrentUser):
+	if not has_role(user, ['admin', 'dev', data.stage]):
+		return JSONResponse(
+			status_code=403,
+			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
+		)
+	success, results = await controller.db.bulk_product_order_transition(
+		data.order_ids, data.stage, user.get('user_id') if user else None
+	)
+	if not success:
+		return JSONResponse(status_code=500, content={'error': results})
+	updated = sum(1 for result in results if result['success'])
+	return JSONResponse(
+		content={
+			'stage': data.stage,
+			'updated': updated,
+			'failed': len(results) - updated,
+			'results': results,
+		}
+	)
+
+
 # UTILS
 @router.get(
 	'/get_customers',
 	summary='Get all customers',
 )
 async def get_customers():
-	return JSONResponse(content=controller.db_manager.get_customers())
+	return JSONResponse(content=await controller.db.get_customers())
 
 
 @router.get(
@@ -266,7 +524,7 @@ async def get_customers():
 	summary='Get all unique CNPJs from product orders',
 )
 async def get_cnpjs():
-	return JSONResponse(content=controller.db_manager.get_cnpjs())
+	return JSONResponse(content=await controller.db.get_cnpjs())
 
 
 @router.get(
@@ -274,7 +532,31 @@ async def get_cnpjs():
 	summary='Get all unique order numbers from product orders',
 )
 async def get_orders_numbers():
-	return JSONResponse(content=controller.db_manager.get_orders_numbers())
+	return JSONResponse(content=await controller.db.get_orders_numbers())
+
+
+@router.get(
+	'/typeahead/{field}',
+	summary='Search a lookup list by prefix',
+	description='`field` is customers, cnpjs, orders_numbers or product_codes. Returns up to `limit` values that start with `q` or have a word starting with it. CNPJs match on digits only.',
+)
+async def typeahead(field: str, q: str = Query(''), limit: int = Query(20, ge=1, le=200)):
+	try:
+		return JSONResponse(content=await controller.db.typeahead(field, q, limit))
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Campo inválido: {e}'})
+
+
+@router.get(
+	'/fulltext',
+	summary='Full-text search of product orders',
+	description='Searches product description, family and comments. Returns up to `limit` results best first, each with the `order`, its `score` and `highlights` (matching fields as HTML with the query words in `<mark>`).',
+)
+async def fulltext(q: str = Query(..., min_length=2), limit: int = Query(50, ge=1, le=200)):
+	try:
+		return JSONResponse(content=await controller.db.search_product_orders_text(q, limit))
+	except ValueError as e:
+		return JSONResponse(status_code=400, content={'error': f'Busca inválida: {e}'})
 
 
 @router.get(
@@ -282,4 +564,4 @@ async def get_orders_numbers():
 	summary='Get all unique product codes from product orders',
 )
 async def get_product_codes():
-	return JSONResponse(content=controller.db_manager.get_product_codes())
+	return JSONResponse(content=await controller.db.get_product_codes())
@@ -4,7 +4,7 @@ from smartx_rfid.utils.path import get_prefix_from_path
 from app.schemas.controller import AddType, AddReader
 from app.services.controller import controller
 import logging
-from app.core import validate_role
+from app.core import conditional_json, validate_role
 
 router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
@@ -15,8 +15,9 @@ router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 	'/get_reader_types',
 	summary='Get all reader types',
 )
-async def get_reader_types():
-	return JSONResponse(content=controller.db_manager.get_reader_types())
+async def get_reader_types(request: Request):
+	version = await controller.db.get_readers_version()
+	return await conditional_json(request, version, controller.db.get_reader_types)
 
 
 @router.get(
@@ -24,7 +25,7 @@ async def get_reader_types():
 	summary='Get a reader type by its ID',
 )
 async def get_reader_type_by_id(reader_type_id: int):
-	return JSONResponse(content=controller.db_manager.get_reader_type(reader_type_id))
+	return JSONResponse(content=await controller.db.get_reader_type(reader_type_id))
 
 
 @router.post(
@@ -38,7 +39,7 @@ async def add_reader_type(request: Request, reader_type_data: AddType):
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		success, msg = controller.db_manager.add_reader_type(
+		success, msg = await controller.db.add_reader_type(
 			name=reader_type_data.name,
 			description=reader_type_data.description,
 		)
@@ -64,7 +65,7 @@ async def update_reader_type(request: Request, reader_type_id: int, reader_type_
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		controller.db_manager.update_reader_type(
+		await controller.db.update_reader_type(
 			reader_type_id=reader_type_id,
 			name=reader_type_data.name,
 			description=reader_type_data.description,
@@ -88,7 +89,7 @@ async def delete_reader_type(request: Request, reader_type_id: int):
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		controller.db_manager.delete_reader_type(reader_type_id)
+		await controller.db.delete_reader_type(reader_type_id)
 		return JSONResponse(content={'message': 'Tipo de leitor deletado com sucesso'})
 	except Exception as e:
 		logging.error(f'Error deleting reader type: {e}')
@@ -108,7 +109,7 @@ async def add_reader(request: Request, reader_data: AddReader):
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		success, msg = controller.db_manager.add_reader(**reader_data.model_dump())
+		success, msg = await controller.db.add_reader(**reader_data.model_dump())
 		if success:
 			return JSONResponse(content={'message': 'Leitor adicionado com sucesso'})
 		else:
@@ -122,8 +123,9 @@ async def add_reader(request: Request, reader_data: AddReader):
 	'/get_readers',
 	summary='Get all readers',
 )
-async def get_readers():
-	return JSONResponse(content=controller.db_manager.get_readers())
+async def get_readers(request: Request):
+	version = await controller.db.get_readers_version()
+	return await conditional_json(request, version, controller.db.get_readers)
 
 
 @router.get(
@@ -131,15 +133,16 @@ async def get_readers():
 	summary='Get a reader by its ID',
 )
 async def get_reader_by_id(reader_id: int):
-	return JSONResponse(content=controller.db_manager.get_reader(reader_id))
+	return JSONResponse(content=await controller.db.get_reader(reader_id))
 
 
 @router.get(
 	'/get_available_readers',
 	summary='Get all available readers (not assigned to any order)',
 )
-async def get_available_readers():
-	return JSONResponse(content=controller.db_manager.get_available_readers())
+async def get_available_readers(request: Request):
+	version = await controller.db.get_readers_version()
+	return await conditional_json(request, version, controller.db.get_available_readers)
 
 
 @router.get(
@@ -147,7 +150,7 @@ async def get_available_readers():
 	summary='Get all readers of a specific type',
 )
 async def get_readers_by_type(reader_type_id: int):
-	return JSONResponse(content=controller.db_manager.get_readers_by_type(reader_type_id))
+	return JSONResponse(content=await controller.db.get_readers_by_type(reader_type_id))
 
 
 @router.get(
@@ -155,7 +158,7 @@ async def get_readers_by_type(reader_type_id: int):
 	summary='Get all readers of a specific type by type name',
 )
 async def get_readers_by_type_name(reader_type_name: str):
-	return JSONResponse(content=controller.db_manager.get_readers_by_type_name(reader_type_name))
+	return JSONResponse(content=await controller.db.get_readers_by_type_name(reader_type_name))
 
 
 @router.get(
@@ -163,7 +166,7 @@ async def get_readers_by_type_name(reader_type_name: str):
 	summary='Get a reader by its ID',
 )
 async def get_reader(reader_id: int):
-	return JSONResponse(content=controller.db_manager.get_reader(reader_id))
+	return JSONResponse(content=await controller.db.get_reader(reader_id))
 
 
 @router.get(
@@ -171,7 +174,7 @@ async def get_reader(reader_id: int):
 	summary='Get a reader by its hostname',
 )
 async def get_reader_by_hostname(hostname: str):
-	return JSONResponse(content=controller.db_manager.get_reader_by_hostname(hostname))
+	return JSONResponse(content=await controller.db.get_reader_by_hostname(hostname))
 
 
 @router.get(
@@ -179,7 +182,7 @@ async def get_reader_by_hostname(hostname: str):
 	summary='Get a reader by its serial number',
 )
 async def get_reader_by_serial(serial_number: str):
-	return JSONResponse(content=controller.db_manager.get_reader_by_serial(serial_number))
+	return JSONResponse(content=await controller.db.get_reader_by_serial(serial_number))
 
 
 @router.put(
@@ -193,7 +196,7 @@ async def update_reader(request: Request, reader_id: int, reader_data: AddReader
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		controller.db_manager.update_reader(reader_id=reader_id, **reader_data.model_dump())
+		await controller.db.update_reader(reader_id=reader_id, **reader_data.model_dump())
 		return JSONResponse(content={'message': 'Leitor atualizado com sucesso'})
 	except Exception as e:
 		logging.error(f'Error updating reader: {e}')
@@ -211,7 +214,7 @@ async def delete_reader(request: Request, reader_id: int):
 			content={'error': 'Proibido: Você não tem permissão para realizar esta ação'},
 		)
 	try:
-		controller.db_manager.delete_reader(reader_id)
+		await controller.db.delete_reader(reader_id)
 		return JSONResponse(content={'message': 'Leitor deletado com sucesso'})
 	except Exception as e:
 		logging.error(f'Error deleting reader: {e}')
@@ -4,7 +4,7 @@ from smartx_rfid.utils.path import get_prefix_from_path
 from app.services.controller import controller
 from app.schemas.auth import AddUserSchema
 from app.core import get_user, validate_role
-from app.services import auth_manager
+from app.services.login import password_hasher
 
 router_prefix = get_prefix_from_path(__file__)
 router = APIRouter(prefix=router_prefix, tags=[router_prefix])
@@ -15,7 +15,7 @@ router = APIRouter(prefix=router_prefix, tags=[router_prefix])
 	summary='Get all users',
 )
 async def get_users(request: Request):
-	return JSONResponse(content=controller.db_manager.get_users())
+	return JSONResponse(content=await controller.db.get_users())
 
 
 @router.get(
@@ -23,7 +23,7 @@ async def get_users(request: Request):
 	summary='Get a user by ID',
 )
 async def get_user_by_id(request: Request, user_id: int):
-	return JSONResponse(content=controller.db_manager.get_user(user_id))
+	return JSONResponse(content=await controller.db.get_user(user_id))
 
 
 @router.get(
@@ -31,7 +31,7 @@ async def get_user_by_id(request: Request, user_id: int):
 	summary='Get a user by username',
 )
 async def get_user_by_username(request: Request, username: str):
-	return JSONResponse(content=controller.db_manager.get_user_by_username(username))
+	return JSONResponse(content=await controller.db.get_user_by_username(username))
 
 
 @router.post(
@@ -42,8 +42,8 @@ async def add_user(request: Request, user_data: AddUserSchema):
 	if not validate_role(request, 'admin'):
 		return JSONResponse(status_code=403, content={'error': 'Proibido: Apenas administradores'})
 	try:
-		password_hash = auth_manager.hash_password(user_data.password)
-		controller.db_manager.add_user(
+		password_hash = await password_hasher.hash(user_data.password)
+		await controller.db.add_user(
 			username=user_data.username,
 			password_hash=password_hash,
 			role=user_data.role,
@@ -65,8 +65,8 @@ async def update_password(request: Request, user_id: int, new_password: str):
 			status_code=403, content={'error': 'Proibido: Você só pode atualizar sua própria senha'}
 		)
 	try:
-		password_hash = auth_manager.hash_password(new_password)
-		controller.db_manager.update_user(user_id, password_hash=password_hash)
+		password_hash = await password_hasher.hash(new_password)
+		await controller.db.update_user(user_id, password_hash=password_hash)
 		return JSONResponse(content={'message': 'Senha do usuário atualizada com sucesso'})
 	except Exception as e:
 		return JSONResponse(
@@ -82,7 +82,7 @@ async def delete_user(request: Request, user_id: int):
 	if not validate_role(request, 'admin'):
 		return JSONResponse(status_code=403, content={'error': 'Proibido: Apenas administradores'})
 	try:
-		controller.db_manager.delete_user(user_id)
+		await controller.db.delete_user(user_id)
 		return JSONResponse(content={'message': 'Usuário deletado com sucesso'})
 	except Exception as e:
 		return JSONResponse(status_code=500, content={'error': f'Falha ao deletar usuário: {e}'})
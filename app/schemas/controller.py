@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
 
 
@@ -18,3 +19,50 @@ class AddOrder(BaseModel):
 	reader_id: int | None = Field(
 		1, description='ID of the reader processing the order, must be greater than 0'
 	)
+
+
+class OrderFilter(BaseModel):
+	client_name: str | None = Field(None, description='Exact client name')
+	cnpj: str | None = Field(None, description='Client CNPJ')
+	product_code: str | None = Field(None, description='Product code')
+	order_number: int | None = Field(None, description='Omie order number')
+	reader_id: int | None = Field(None, description='ID of the assigned reader')
+	reader_serial: str | None = Field(None, description='Serial number of the assigned reader')
+	reader_type_id: int | None = Field(None, description='ID of the assigned reader type')
+	reader_type_name: str | None = Field(None, description='Name of the assigned reader type')
+	start_date: datetime | None = Field(None, description='Start of the date range (ISO format)')
+	end_date: datetime | None = Field(None, description='End of the date range (ISO format)')
+	date_field: str = Field('created_at', description='Date column used by the date range')
+
+
+class OrderSearch(OrderFilter):
+	status: str | None = Field(
+		None, description='Workflow stage: pendente, montado, testado, enviado or ativado'
+	)
+
+
+class BulkTransition(BaseModel):
+	order_ids: list[int] = Field(
+		..., min_length=1, max_length=1000, description='IDs of the product orders'
+	)
+	stage: str = Field(
+		..., pattern='^(mount|test|ship|activate)$', description='mount, test, ship or activate'
+	)
+
+
+class ReaderAssignment(BaseModel):
+	order_id: int = Field(..., description='ID of the product order')
+	reader_id: int = Field(..., description='ID of the reader')
+
+
+class BulkReaderAssignment(BaseModel):
+	assignments: list[ReaderAssignment] = Field(
+		default_factory=list, max_length=1000, description='(order_id, reader_id) pairs'
+	)
+	order_number: int | None = Field(
+		None, description='Omie order number whose items without reader get available readers'
+	)
+	reader_type_id: int | None = Field(None, description='Type of the available readers')
+	quantity: int | None = Field(
+		None, ge=1, description='Number of items to fill (default: all items without reader)'
+	)
@@ -0,0 +1,57 @@
+import bisect
+
+# Upper bounds (seconds) of the dwell time histogram buckets; the last bucket
+# is open-ended
+DWELL_BUCKETS = (
+	60,
+	5 * 60,
+	15 * 60,
+	30 * 60,
+	3600,
+	2 * 3600,
+	4 * 3600,
+	8 * 3600,
+	12 * 3600,
+	86400,
+	2 * 86400,
+	3 * 86400,
+	5 * 86400,
+	7 * 86400,
+	14 * 86400,
+	30 * 86400,
+	60 * 86400,
+)
+# Bucket of the orders whose previous stage has no timestamp
+UNKNOWN_BUCKET = -1
+
+
+def dwell_bucket(seconds: float | None) -> int:
+	"""Index in DWELL_BUCKETS of the first bucket that holds `seconds`."""
+	if seconds is None:
+		return UNKNOWN_BUCKET
+	return bisect.bisect_left(DWELL_BUCKETS, max(seconds, 0))
+
+
+def percentile(counts: dict[int, int], q: float) -> float | None:
+	"""
+	Approximate `q` percentile (0-1) in seconds from histogram bucket counts.
+
+	Interpolates linearly inside the bucket that holds the rank; the open-ended
+	last bucket reports its lower bound.
+	"""
+	counts = {bucket: n for bucket, n in counts.items() if bucket != UNKNOWN_BUCKET and n}
+	total = sum(counts.values())
+	if not total:
+		return None
+	rank = q * total
+	seen = 0
+	for bucket in sorted(counts):
+		n = counts[bucket]
+		if seen + n >= rank:
+			lower = DWELL_BUCKETS[bucket - 1] if bucket > 0 else 0
+			if bucket >= len(DWELL_BUCKETS):
+				return float(lower)
+			upper = DWELL_BUCKETS[bucket]
+			return round(lower + (upper - lower) * (rank - seen) / n, 1)
+		seen += n
+	return float(DWELL_BUCKETS[-1])
@@ -0,0 +1,101 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Gauge, Histogram
+
+DB_WAIT_SECONDS = Histogram(
+	'db_executor_wait_seconds',
+	'Time a database call waited for a free worker thread',
+	buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_RUN_SECONDS = Histogram(
+	'db_executor_run_seconds',
+	'Time a database call spent running on a worker thread',
+	buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUEUED = Gauge('db_executor_queued', 'Database calls waiting for a worker thread')
+DB_RUNNING = Gauge('db_executor_running', 'Database calls running on a worker thread')
+DB_POOL_CHECKED_OUT = Gauge(
+	'db_pool_checked_out', 'Connections checked out from the SQLAlchemy pool'
+)
+
+
+class AsyncDb:
+	"""
+	Async facade over a synchronous SmtxDb.
+
+	Every method of the wrapped object is exposed as a coroutine that runs on a
+	bounded thread pool, so a slow query never blocks the event loop:
+
+	    orders = await controller.db.get_product_orders()
+	"""
+
+	def __init__(self, db, max_workers: int = 10):
+		self._db = db
+		self.max_workers = max_workers
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+		self._lock = threading.Lock()
+		self._queued = 0
+		self._running = 0
+		self._completed = 0
+		self._failed = 0
+
+		DB_QUEUED.set_function(lambda: self._queued)
+		DB_RUNNING.set_function(lambda: self._running)
+		DB_POOL_CHECKED_OUT.set_function(
+			lambda: self._db.db_manager.get_connection_info().get('checked_out_connections', 0)
+		)
+
+	def _call(self, submitted_at: float, func, *args, **kwargs):
+		started_at = time.perf_counter()
+		with self._lock:
+			self._queued -= 1
+			self._running += 1
+		DB_WAIT_SECONDS.observe(started_at - submitted_at)
+		try:
+			result = func(*args, **kwargs)
+			with self._lock:
+				self._completed += 1
+			return result
+		except Exception:
+			with self._lock:
+				self._failed += 1
+			raise
+		finally:
+			with self._lock:
+				self._running -= 1
+			DB_RUN_SECONDS.observe(time.perf_counter() - started_at)
+
+	async def run(self, func, *args, **kwargs):
+		"""Run any blocking callable on the database thread pool."""
+		with self._lock:
+			self._queued += 1
+		loop = asyncio.get_running_loop()
+		call = functools.partial(self._call, time.perf_counter(), func, *args, **kwargs)
+		return await loop.run_in_executor(self._executor, call)
+
+	def __getattr__(self, name: str):
+		attr = getattr(self._db, name)
+		if not callable(attr):
+			return attr
+
+		@functools.wraps(attr)
+		async def wrapper(*args, **kwargs):
+			return await self.run(attr, *args, **kwargs)
+
+		return wrapper
+
+	def get_metrics(self) -> dict:
+		"""Thread pool counters plus the SQLAlchemy connection pool status."""
+		with self._lock:
+			executor = {
+				'max_workers': self.max_workers,
+				'queued': self._queued,
+				'running': self._running,
+				'completed': self._completed,
+				'failed': self._failed,
+			}
+		return {'executor': executor, 'connection_pool': self._db.db_manager.get_connection_info()}
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+CACHE_HITS = Counter('lookup_cache_hits', 'Lookup cache hits', ['key'])
+CACHE_MISSES = Counter('lookup_cache_misses', 'Lookup cache misses', ['key'])
+
+
+class LookupCache:
+	"""
+	Thread-safe in-process TTL + LRU cache for the lookup lists.
+
+	Entries expire after `ttl` seconds and the least recently used one is dropped
+	when `maxsize` is reached. Write paths call `invalidate` with the keys they
+	make stale.
+	"""
+
+	def __init__(self, ttl: float = 60, maxsize: int = 128):
+		self.ttl = ttl
+		self.maxsize = maxsize
+		self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+		self._lock = threading.Lock()
+		# Bumped on every invalidation so a load that raced with a write is not stored
+		self._generation = 0
+
+	def get_or_load(self, key: str, loader):
+		"""Return the cached value of `key`, calling `loader()` on a miss."""
+		now = time.monotonic()
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is not None and entry[0] > now:
+				self._data.move_to_end(key)
+				CACHE_HITS.labels(key=key).inc()
+				return entry[1]
+			generation = self._generation
+		CACHE_MISSES.labels(key=key).inc()
+
+		value = loader()
+		with self._lock:
+			if generation != self._generation:
+				return value
+			self._data[key] = (now + self.ttl, value)
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+		return value
+
+	def invalidate(self, *keys: str):
+		"""Drop the given keys, or everything when called without keys."""
+		with self._lock:
+			self._generation += 1
+			if not keys:
+				self._data.clear()
+				return
+			for key in keys:
+				self._data.pop(key, None)
@@ -0,0 +1,1389 @@
+import base64
+import binascii
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import aliased
+from smartx_rfid.smtx_db.main import SmtxDb
+from smartx_rfid.models.orders import Orders, Readers, ReadersType
+from smartx_rfid.models.users import Users
+
+from app.models.app_state import AppState
+from app.models.order_changes import OrderChanges
+from app.models.orders import OMIE_FIELDS, cnpj_digits
+from app.models.workflow_rollups import WorkflowRollups
+
+from .analytics import DWELL_BUCKETS, dwell_bucket, percentile
+from .cache import LookupCache
+from .events import OrderEvents
+from .fulltext import InvertedIndex, highlight, tokenize
+from .typeahead import TypeaheadIndex, normalize_digits, normalize_text
+
+
+class ControllerDb(SmtxDb):
+	"""SmtxDb with the extra queries used by the dashboard and the API."""
+
+	# Labels added by `_product_orders_query` to each order
+	ORDER_EXTRA_FIELDS = (
+		'reader_serial',
+		'reader_hostname',
+		'reader_type_name',
+		'created_by_username',
+		'mounted_by_username',
+		'tested_by_username',
+		'shipped_by_username',
+		'activated_by_username',
+	)
+	ORDER_SORT_KEYS = ('id', 'created_at')
+	ORDER_DATE_FIELDS = ('created_at', 'mounted_at', 'tested_at', 'shipped_at', 'activated_at')
+	ORDER_STATUSES = ('pendente', 'montado', 'testado', 'enviado', 'ativado')
+	# stage: (required column, error if missing, done column, user column, error if done)
+	WORKFLOW_STAGES = {
+		'mount': (
+			'reader_id',
+			'Order must have a reader assigned before mounting',
+			'mounted_at',
+			'mounted_by',
+			'Order already mounted',
+		),
+		'test': (
+			'mounted_at',
+			'Order must be mounted before testing',
+			'tested_at',
+			'tested_by',
+			'Order already tested',
+		),
+		'ship': (
+			'tested_at',
+			'Order must be tested before shipping',
+			'shipped_at',
+			'shipped_by',
+			'Order already shipped',
+		),
+		'activate': (
+			'shipped_at',
+			'Order must be shipped before activation',
+			'activated_at',
+			'activated_by',
+			'Order already activated',
+		),
+	}
+	ORDER_LOOKUPS = ('customers', 'cnpjs', 'orders_numbers', 'product_codes')
+	READER_LOOKUPS = ('reader_types', 'readers')
+	# typeahead field: (orders column, normalization)
+	TYPEAHEAD_FIELDS = {
+		'customers': ('client_name', normalize_text),
+		'cnpjs': ('client_cnpj', normalize_digits),
+		'orders_numbers': ('order_number', normalize_text),
+		'product_codes': ('product_code', normalize_text),
+	}
+	# Columns covered by the full-text search, with their weight in the ranking
+	FULLTEXT_FIELDS = {'product_description': 2.0, 'product_family': 1.5, 'comments': 1.0}
+	TABLES = {'orders': Orders, 'readers': Readers, 'reader_types': ReadersType, 'users': Users}
+	# Tables whose rows show up in each list, used to build its version
+	ORDER_LIST_TABLES = ('orders', 'readers', 'reader_types', 'users')
+	READER_LIST_TABLES = ('readers', 'reader_types')
+	# Workflow analytics: group name -> column, see `refresh_workflow_rollups`
+	ANALYTICS_DIMENSIONS = {
+		'product_family': Orders.product_family,
+		'reader_type': ReadersType.name,
+	}
+	ROLLUP_WATERMARK_KEY = 'workflow_rollups.watermark'
+	# Transitions newer than this are left for the next refresh, so one whose
+	# transaction is still open is not skipped
+	ROLLUP_LAG = timedelta(seconds=5)
+	ROLLUP_REFRESH_INTERVAL = 30
+	# Values per IN (...) lookup, below SQLite's 999 bound parameters
+	IN_CHUNK_SIZE = 900
+
+	def __init__(self, connection_string: str, cache_ttl: float = 60, cache_size: int = 128):
+		super().__init__(connection_string)
+		self.lookup_cache = LookupCache(ttl=cache_ttl, maxsize=cache_size)
+		self._changes = dict.fromkeys(self.TABLES, 0)
+		self._changes_lock = threading.Lock()
+		self.order_events = OrderEvents()
+		self._typeahead: dict[str, TypeaheadIndex] = {}
+		self._typeahead_lock = threading.Lock()
+		self._fulltext: InvertedIndex | None = None
+		self._fulltext_lock = threading.Lock()
+		self._rollups_lock = threading.Lock()
+		self._rollups_refreshed_at = float('-inf')
+
+	# [ HELPERS ]
+	def _product_orders_query(self, session):
+		"""Base query for product orders joined with reader, reader type and usernames."""
+		CreatedBy = aliased(Users)
+		MountedBy = aliased(Users)
+		TestedBy = aliased(Users)
+		ShippedBy = aliased(Users)
+		ActivatedBy = aliased(Users)
+
+		return (
+			session.query(
+				Orders,
+				Readers.serial_number.label('reader_serial'),
+				Readers.hostname.label('reader_hostname'),
+				ReadersType.name.label('reader_type_name'),
+				CreatedBy.username.label('created_by_username'),
+				MountedBy.username.label('mounted_by_username'),
+				TestedBy.username.label('tested_by_username'),
+				ShippedBy.username.label('shipped_by_username'),
+				ActivatedBy.username.label('activated_by_username'),
+			)
+			.outerjoin(Readers, Orders.reader_id == Readers.id)
+			.outerjoin(ReadersType, Readers.reader_type_id == ReadersType.id)
+			.outerjoin(CreatedBy, Orders.created_by == CreatedBy.id)
+			.outerjoin(MountedBy, Orders.mounted_by == MountedBy.id)
+			.outerjoin(TestedBy, Orders.tested_by == TestedBy.id)
+			.outerjoin(ShippedBy, Orders.shipped_by == ShippedBy.id)
+			.outerjoin(ActivatedBy, Orders.activated_by == ActivatedBy.id)
+		)
+
+	@classmethod
+	def _decode_product_order(cls, row) -> dict:
+		"""Convert a row of `_product_orders_query` into the dict returned by the API."""
+		order, *extras = row
+		d = order.to_dict()
+		for key, value in zip(cls.ORDER_EXTRA_FIELDS, extras):
+			d[key] = value
+		return d
+
+	@classmethod
+	def order_fields(cls) -> list[str]:
+		"""Keys of the product order dicts, in column order."""
+		return [column.name for column in Orders.__table__.columns] + list(cls.ORDER_EXTRA_FIELDS)
+
+	@staticmethod
+	def _status_condition(status: str):
+		"""SQL condition matching the current workflow stage of an order."""
+		stages = [
+			('ativado', Orders.activated_at),
+			('enviado', Orders.shipped_at),
+			('testado', Orders.tested_at),
+			('montado', Orders.mounted_at),
+		]
+		conditions = []
+		for name, column in stages:
+			if name == status:
+				conditions.append(column.isnot(None))
+				return and_(*conditions)
+			conditions.append(column.is_(None))
+		# pendente: no workflow step done yet
+		return and_(*conditions)
+
+	@staticmethod
+	def _stage_expression():
+		"""SQL expression with the current workflow stage name of an order."""
+		return case(
+			(Orders.activated_at.isnot(None), 'ativado'),
+			(Orders.shipped_at.isnot(None), 'enviado'),
+			(Orders.tested_at.isnot(None), 'testado'),
+			(Orders.mounted_at.isnot(None), 'montado'),
+			else_='pendente',
+		)
+
+	def _order_filters(self, filters: dict | None) -> list:
+		"""
+		Translate the search filters into SQL conditions.
+
+		Supported keys: client_name, cnpj, product_code, order_number, reader_id,
+		reader_serial, reader_type_id, reader_type_name, status, start_date,
+		end_date and date_field (default created_at).
+
+		Raises:
+		    ValueError: If the status or the date field is invalid
+		"""
+		conditions = []
+		if not filters:
+			return conditions
+
+		equals = {
+			'client_name': Orders.client_name,
+			'cnpj': Orders.client_cnpj_digits,
+			'product_code': Orders.product_code,
+			'order_number': Orders.order_number,
+			'reader_id': Orders.reader_id,
+			'reader_serial': Readers.serial_number,
+			'reader_type_id': Readers.reader_type_id,
+			'reader_type_name': ReadersType.name,
+		}
+		for key, column in equals.items():
+			value = filters.get(key)
+			if value is not None and value != '':
+				if key == 'cnpj':
+					value = cnpj_digits(value) or ''
+				conditions.append(column == value)
+
+		status = filters.get('status')
+		if status:
+			if status not in self.ORDER_STATUSES:
+				raise ValueError(f"Invalid status '{status}'. Use one of {self.ORDER_STATUSES}")
+			conditions.append(self._status_condition(status))
+
+		start_date = filters.get('start_date')
+		end_date = filters.get('end_date')
+		if start_date is not None or end_date is not None:
+			date_field = filters.get('date_field') or 'created_at'
+			if date_field not in self.ORDER_DATE_FIELDS:
+				raise ValueError(
+					f"Invalid date field '{date_field}'. Use one of {self.ORDER_DATE_FIELDS}"
+				)
+			date_column = getattr(Orders, date_field)
+			if start_date is not None:
+				conditions.append(date_column >= start_date)
+			if end_date is not None:
+				conditions.append(date_column <= end_date)
+
+		return conditions
+
+	@staticmethod
+	def encode_cursor(data: dict) -> str:
+		raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+		return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+	@staticmethod
+	def decode_cursor(cursor: str) -> dict:
+		"""Decode a cursor produced by `encode_cursor`. Raises ValueError if malformed."""
+		try:
+			padded = cursor + '=' * (-len(cursor) % 4)
+			data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+		except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+			raise ValueError(f'Invalid cursor: {e}')
+		if not isinstance(data, dict) or 'id' not in data:
+			raise ValueError('Invalid cursor: missing id')
+		return data
+
+	def _keyset(self, sort: str, descending: bool, cursor: str | None) -> tuple[list, list]:
+		"""
+		Build the filter and ORDER BY clauses of a keyset page ordered by (sort, id).
+
+		Raises:
+		    ValueError: If the sort key or the cursor is invalid
+		"""
+		if sort not in self.ORDER_SORT_KEYS:
+			raise ValueError(f"Invalid sort key '{sort}'. Use one of {self.ORDER_SORT_KEYS}")
+
+		sort_column = getattr(Orders, sort)
+		filters = []
+		if cursor:
+			data = self.decode_cursor(cursor)
+			if data.get('sort') != sort or data.get('desc') != descending:
+				raise ValueError('Cursor does not match the requested sort')
+			last_id = int(data['id'])
+			if sort == 'id':
+				filters.append(Orders.id < last_id if descending else Orders.id > last_id)
+			else:
+				# Compare against the stored value of the cursor row so the database does the
+				# comparison in its own representation (SQLite keeps datetimes as strings)
+				last_value = select(sort_column).where(Orders.id == last_id).scalar_subquery()
+				if descending:
+					filters.append(
+						or_(
+							sort_column < last_value,
+							and_(sort_column == last_value, Orders.id < last_id),
+						)
+					)
+				else:
+					filters.append(
+						or_(
+							sort_column > last_value,
+							and_(sort_column == last_value, Orders.id > last_id),
+						)
+					)
+
+		if sort == 'id':
+			order_by = [Orders.id.desc() if descending else Orders.id.asc()]
+		elif descending:
+			order_by = [sort_column.desc(), Orders.id.desc()]
+		else:
+			order_by = [sort_column.asc(), Orders.id.asc()]
+		return filters, order_by
+
+	def _build_page(self, items: list, limit: int, sort: str, descending: bool) -> dict:
+		"""Trim the `limit + 1` rows fetched by a keyset query and build the next cursor."""
+		has_more = len(items) > limit
+		items = items[:limit]
+		next_cursor = None
+		if has_more and items:
+			last = items[-1]
+			next_cursor = self.encode_cursor(
+				{'sort': sort, 'desc': descending, 'id': last.get('id')}
+			)
+		return {
+			'items': items,
+			'limit': limit,
+			'sort': sort,
+			'order': 'desc' if descending else 'asc',
+			'next_cursor': next_cursor,
+		}
+
+	# [ PRODUCT ORDERS ]
+	def get_product_orders_page(
+		self,
+		filters: dict | None = None,
+		limit: int = 50,
+		cursor: str | None = None,
+		sort: str = 'id',
+		descending: bool = True,
+	) -> dict:
+		"""
+		Keyset-paginated product orders, optionally filtered (see `_order_filters`).
+
+		Pages are ordered by (sort, id) so the position is stable while new orders
+		are inserted. Pass the returned `next_cursor` to get the following page.
+		All filters are combined with AND into a single query.
+
+		Raises:
+		    ValueError: If a filter, the sort key or the cursor is invalid
+		"""
+		conditions = self._order_filters(filters)
+		keyset_filters, order_by = self._keyset(sort, descending, cursor)
+		with self.db_manager.get_session() as session:
+			query = (
+				self._product_orders_query(session)
+				.filter(*conditions, *keyset_filters)
+				.order_by(*order_by)
+			)
+			rows = query.limit(limit + 1).all()
+			items = [self._decode_product_order(row) for row in rows]
+		logging.debug(f'Fetched {len(items)} product orders (filters={filters}, cursor={cursor})')
+		return self._build_page(items, limit, sort, descending)
+
+	def iter_product_orders(self, filters: dict | None = None, batch_size: int = 1000):
+		"""
+		Generator of the filtered product orders in lists of `batch_size`, ordered by id.
+
+		Rows are read from a server-side cursor (`yield_per`), so memory stays
+		constant whatever the size of the table. Close the generator to release
+		the connection early.
+
+		Raises:
+		    ValueError: If a filter is invalid (raised here, not on iteration)
+		"""
+		conditions = self._order_filters(filters)
+		return self._iter_product_orders(conditions, batch_size)
+
+	def _iter_product_orders(self, conditions: list, batch_size: int):
+		with self.db_manager.get_session() as session:
+			query = (
+				self._product_orders_query(session)
+				.filter(*conditions)
+				.order_by(Orders.id)
+				.yield_per(batch_size)
+			)
+			batch = []
+			for row in query:
+				batch.append(self._decode_product_order(row))
+				if len(batch) >= batch_size:
+					yield batch
+					batch = []
+			if batch:
+				yield batch
+
+	def get_product_order_stats(self, filters: dict | None = None) -> dict:
+		"""
+		Number of product orders in each workflow stage plus the total.
+
+		Accepts the same filters as `get_product_orders_page` and runs a single
+		GROUP BY query.
+
+		Raises:
+		    ValueError: If a filter is invalid
+		"""
+		conditions = self._order_filters(filters)
+		stage = self._stage_expression().label('stage')
+		with self.db_manager.get_session() as session:
+			rows = (
+				session.query(stage, func.count(Orders.id))
+				.outerjoin(Readers, Orders.reader_id == Readers.id)
+				.outerjoin(ReadersType, Readers.reader_type_id == ReadersType.id)
+				.filter(*conditions)
+				.group_by(stage)
+				.all()
+			)
+		stats = dict.fromkeys(self.ORDER_STATUSES, 0)
+		stats.update({name: count for name, count in rows})
+		stats['total'] = sum(count for _, count in rows)
+		return stats
+
+	def get_product_orders_by_cnpj(self, cnpj: str):
+		"""Product orders of a CNPJ, matched on its digits so any formatting works."""
+		digits = cnpj_digits(cnpj)
+		if digits is None:
+			return []
+		return self.get_product_orders(filters={'client_cnpj_digits': digits})
+
+	# [ OMIE SYNC ]
+	def get_omie_hashes(self, order_numbers: list[int]) -> dict[int, dict]:
+		"""
+		{order_number: {'hash', 'ids'}} of the given orders that exist locally,
+		with the ids of their rows in insertion order. Numbers missing from the
+		result are not in the database.
+
+		Looked up IN_CHUNK_SIZE numbers at a time, reading only the number, id
+		and hash columns, so the cost follows the incoming orders and not the
+		size of the table.
+		"""
+		result: dict[int, dict] = {}
+		order_numbers = list(dict.fromkeys(order_numbers))
+		with self.db_manager.get_session() as session:
+			for start in range(0, len(order_numbers), self.IN_CHUNK_SIZE):
+				chunk = order_numbers[start : start + self.IN_CHUNK_SIZE]
+				rows = (
+					session.query(Orders.order_number, Orders.id, Orders.omie_hash)
+					.filter(Orders.order_number.in_(chunk))
+					.order_by(Orders.id)
+				)
+				for order_number, order_id, hash_ in rows:
+					entry = result.setdefault(order_number, {'hash': hash_, 'ids': []})
+					entry['ids'].append(order_id)
+		return result
+
+	def bulk_update_omie_fields(
+		self,
+		updates: list[dict],
+		batch_size: int = 500,
+		on_batch: Callable[[int, int], None] | None = None,
+	) -> tuple[list[int], list[dict]]:
+		"""
+		Rewrite the Omie fields (OMIE_FIELDS and omie_hash) of many product orders,
+		`batch_size` rows per transaction with one executemany UPDATE by id.
+
+		Each dict has the `id` of the row plus the new values. A batch that fails
+		is retried row by row, so only the bad rows are rejected.
+		`on_batch(updated, rejected)` is called with the running totals after
+		each batch.
+
+		Returns:
+		    (ids of the updated rows, [{'order_number', 'error'}] of the rejected ones)
+		"""
+		rows = [
+			{
+				'id': item['id'],
+				'omie_hash': item['omie_hash'],
+				'client_cnpj_digits': cnpj_digits(item.get('client_cnpj')),
+				**{field: item.get(field) for field in OMIE_FIELDS},
+			}
+			for item in updates
+		]
+		updated, errors = [], []
+		for start in range(0, len(rows), batch_size):
+			batch = rows[start : start + batch_size]
+			try:
+				with self.db_manager.get_session() as session:
+					session.execute(update(Orders), batch)
+				updated.extend(row['id'] for row in batch)
+			except Exception as e:
+				logging.warning(
+					f'Batch of {len(batch)} product orders failed, retrying per row: {e}'
+				)
+				for row, item in zip(batch, updates[start : start + batch_size]):
+					try:
+						with self.db_manager.get_session() as session:
+							session.execute(update(Orders), [row])
+						updated.append(row['id'])
+					except Exception as e:
+						errors.append({'order_number': item.get('order_number'), 'error': str(e)})
+			if on_batch:
+				on_batch(len(updated), len(errors))
+		logging.info(f'Bulk update of Omie fields: {len(updated)} updated, {len(errors)} failed')
+
+		if updated:
+			self._after_write('orders', *self.ORDER_LOOKUPS)
+			self._typeahead_reset()
+			self._fulltext_reset()
+			self._orders_changed('updated', updated)
+		return updated, errors
+
+	# [ CHANGES ]
+	def get_order_changes_version_at(self, timestamp: datetime) -> int:
+		"""Last change version recorded before `timestamp`."""
+		with self.db_manager.get_session() as session:
+			first = (
+				session.query(func.min(OrderChanges.id))
+				.filter(OrderChanges.created_at >= timestamp)
+				.scalar()
+			)
+			if first is not None:
+				return first - 1
+			return session.query(func.max(OrderChanges.id)).scalar() or 0
+
+	def get_product_order_changes(self, since: int = 0, limit: int = 1000) -> dict:
+		"""
+		Product orders changed after the change version `since`.
+
+		Reads at most `limit` entries of `order_changes` and returns the current
+		state of each changed order, the IDs of the deleted ones and the new
+		`version` to send as `since` on the next call. `has_more` means the
+		client should call again right away.
+		"""
+		with self.db_manager.get_session() as session:
+			changes = (
+				session.query(OrderChanges.id, OrderChanges.order_id, OrderChanges.action)
+				.filter(OrderChanges.id > since)
+				.order_by(OrderChanges.id)
+				.limit(limit + 1)
+				.all()
+			)
+			has_more = len(changes) > limit
+			changes = changes[:limit]
+			if changes:
+				version = changes[-1].id
+			else:
+				version = session.query(func.max(OrderChanges.id)).scalar() or 0
+
+			# Only the last action of each order matters
+			last_action = {change.order_id: change.action for change in changes}
+			changed_ids = [
+				order_id for order_id, action in last_action.items() if action != 'deleted'
+			]
+			orders = []
+			if changed_ids:
+				rows = (
+					self._product_orders_query(session)
+					.filter(Orders.id.in_(changed_ids))
+					.order_by(Orders.id)
+					.all()
+				)
+				orders = [self._decode_product_order(row) for row in rows]
+
+		found = {order.get('id') for order in orders}
+		deleted = [order_id for order_id in last_action if order_id not in found]
+		logging.debug(
+			f'Order changes since version {since}: {len(orders)} changed, {len(deleted)} deleted'
+		)
+		return {
+			'since': since,
+			'version': version,
+			'has_more': has_more,
+			'orders': orders,
+			'deleted': deleted,
+		}
+
+	# [ WORKFLOW ]
+	def bulk_product_order_transition(self, order_ids: list[int], stage: str, user_id: int | None):
+		"""
+		Move many product orders to the next workflow stage in a single transaction.
+
+		Each order is checked with the same rules as `product_order_mount`,
+		`product_order_test`, `product_order_ship` and `product_order_activate`;
+		orders that fail a rule are skipped and reported, the others are updated.
+
+		Returns:
+		    (True, results) with one {'order_id', 'success', 'message'} per ID,
+		    or (False, error) if the transaction failed.
+
+		Raises:
+		    ValueError: If the stage is invalid
+		"""
+		if stage not in self.WORKFLOW_STAGES:
+			raise ValueError(f"Invalid stage '{stage}'. Use one of {tuple(self.WORKFLOW_STAGES)}")
+		required, required_msg, done, done_by, done_msg = self.WORKFLOW_STAGES[stage]
+		order_ids = list(dict.fromkeys(order_ids))
+		logging.info(f'Bulk {stage} of {len(order_ids)} product orders by user id={user_id}')
+
+		results = []
+		try:
+			with self.db_manager.get_session() as session:
+				orders = {
+					order.id: order
+					for order in session.query(Orders)
+					.filter(Orders.id.in_(order_ids))
+					.with_for_update()
+				}
+				now = datetime.now()
+				for order_id in order_ids:
+					order = orders.get(order_id)
+					if order is None:
+						message = f'Orders with id {order_id} not found'
+					elif getattr(order, required) is None:
+						message = required_msg
+					elif getattr(order, done) is not None:
+						message = done_msg
+					else:
+						setattr(order, done, now)
+						setattr(order, done_by, user_id)
+						message = None
+					results.append(
+						{'order_id': order_id, 'success': message is None, 'message': message}
+					)
+		except Exception as e:
+			logging.error(f'Error in bulk {stage} of product orders: {e}')
+			return False, str(e)
+
+		updated = [result['order_id'] for result in results if result['success']]
+		if updated:
+			self._after_write('orders')
+			self._orders_changed(stage, updated)
+		return True, results
+
+	# [ READER ASSIGNMENT ]
+	def bulk_add_readers_to_product_orders(self, assignments: list[tuple[int, int]]):
+		"""
+		Assign many (order_id, reader_id) pairs atomically.
+
+		Orders and readers are locked with SELECT ... FOR UPDATE and validated with
+		the same rules as `add_reader_to_product_order`. If any pair is invalid
+		nothing is written.
+
+		Returns:
+		    (True, assigned) with one {'order_id', 'reader_id'} per pair, or
+		    (False, errors) with one {'order_id', 'reader_id', 'message'} per invalid pair
+		"""
+		logging.info(f'Bulk assigning {len(assignments)} readers to product orders')
+		order_ids = Counter(order_id for order_id, _ in assignments)
+		reader_ids = Counter(reader_id for _, reader_id in assignments)
+		try:
+			with self.db_manager.get_session() as session:
+				orders = {
+					order.id: order
+					for order in session.query(Orders)
+					.filter(Orders.id.in_(list(order_ids)))
+					.order_by(Orders.id)
+					.with_for_update()
+				}
+				previous_ids = {order.reader_id for order in orders.values() if order.reader_id}
+				readers = {
+					reader.id: reader
+					for reader in session.query(Readers)
+					.filter(Readers.id.in_(set(reader_ids) | previous_ids))
+					.order_by(Readers.id)
+					.with_for_update()
+				}
+
+				errors = []
+				for order_id, reader_id in assignments:
+					reader = readers.get(reader_id)
+					if order_id not in orders:
+						message = f'Orders with id {order_id} not found'
+					elif reader is None:
+						message = f'Reader with id {reader_id} not found'
+					elif not reader.available:
+						message = f'Reader with id {reader_id} is not available'
+					elif order_ids[order_id] > 1:
+						message = f'Order id {order_id} is repeated in the batch'
+					elif reader_ids[reader_id] > 1:
+						message = f'Reader id {reader_id} is repeated in the batch'
+					else:
+						continue
+					errors.append(
+						{'order_id': order_id, 'reader_id': reader_id, 'message': message}
+					)
+
+				if errors:
+					session.rollback()
+					return False, errors
+
+				for order_id, reader_id in assignments:
+					order = orders[order_id]
+					# Free previous reader if any
+					if order.reader_id and order.reader_id in readers:
+						readers[order.reader_id].available = True
+					order.reader_id = reader_id
+					readers[reader_id].available = False
+		except Exception as e:
+			logging.error(f'Error in bulk reader assignment: {e}')
+			return False, [{'order_id': None, 'reader_id': None, 'message': str(e)}]
+
+		self._after_write('orders')
+		self._after_write('readers', 'readers')
+		self._orders_changed('assign', list(order_ids))
+		return True, [
+			{'order_id': order_id, 'reader_id': reader_id} for order_id, reader_id in assignments
+		]
+
+	def assign_available_readers(
+		self, order_number: int, reader_type_id: int, quantity: int | None = None
+	):
+		"""
+		Assign available readers of a type to the items of an Omie order without reader.
+
+		Fills `quantity` items (all of them by default). Readers are picked with
+		SELECT ... FOR UPDATE SKIP LOCKED, so concurrent batches never get the same
+		reader. Nothing is written unless every item gets a reader.
+
+		Returns:
+		    (True, assigned) with one {'order_id', 'reader_id', 'serial_number'} per
+		    item, or (False, message)
+		"""
+		logging.info(
+			f'Assigning available readers of type id={reader_type_id} to order number={order_number}'
+		)
+		try:
+			with self.db_manager.get_session() as session:
+				query = (
+					session.query(Orders)
+					.filter(Orders.order_number == order_number, Orders.reader_id.is_(None))
+					.order_by(Orders.id)
+					.with_for_update(skip_locked=True)
+				)
+				if quantity:
+					query = query.limit(quantity)
+				orders = query.all()
+				if not orders:
+					return (
+						False,
+						f'No product orders without reader for order number {order_number}',
+					)
+				if quantity and len(orders) < quantity:
+					session.rollback()
+					return (
+						False,
+						f'Order number {order_number} has only {len(orders)} items without reader',
+					)
+
+				readers = (
+					session.query(Readers)
+					.filter(Readers.reader_type_id == reader_type_id, Readers.available.is_(True))
+					.order_by(Readers.id)
+					.limit(len(orders))
+					.with_for_update(skip_locked=True)
+					.all()
+				)
+				if len(readers) < len(orders):
+					session.rollback()
+					return (
+						False,
+						f'Only {len(readers)} available readers of type id {reader_type_id}, '
+						f'{len(orders)} needed',
+					)
+
+				assigned = []
+				for order, reader in zip(orders, readers):
+					order.reader_id = reader.id
+					reader.available = False
+					assigned.append(
+						{
+							'order_id': order.id,
+							'reader_id': reader.id,
+							'serial_number': reader.serial_number,
+						}
+					)
+		except Exception as e:
+			logging.error(f'Error assigning available readers: {e}')
+			return False, str(e)
+
+		self._after_write('orders')
+		self._after_write('readers', 'readers')
+		self._orders_changed('assign', [item['order_id'] for item in assigned])
+		return True, assigned
+
+	# [ ANALYTICS ]
+	@staticmethod
+	def _seconds_between(start: datetime | None, end: datetime) -> float | None:
+		if start is None:
+			return None
+		if (start.tzinfo is None) != (end.tzinfo is None):
+			start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+		return (end - start).total_seconds()
+
+	def refresh_workflow_rollups(self) -> int:
+		"""
+		Add the stage transitions recorded since the last refresh to the rollups.
+
+		Reads only the orders whose stage timestamp is past the watermark kept in
+		`app_state` (the first run backfills the whole history), adds them to
+		`workflow_rollups` and moves the watermark in the same transaction.
+
+		Returns:
+		    The number of transitions added
+		"""
+		with self._rollups_lock:
+			upper = datetime.now() - self.ROLLUP_LAG
+			counts = Counter()
+			with self.db_manager.get_session() as session:
+				state = session.get(AppState, self.ROLLUP_WATERMARK_KEY, with_for_update=True)
+				since = datetime.fromisoformat(state.value) if state and state.value else None
+				for stage, (required, _, done, _, _) in self.WORKFLOW_STAGES.items():
+					# Mounting needs a reader, not a previous stage: wait since creation
+					previous = Orders.created_at if stage == 'mount' else getattr(Orders, required)
+					done_column = getattr(Orders, done)
+					query = (
+						session.query(done_column, previous, *self.ANALYTICS_DIMENSIONS.values())
+						.outerjoin(Readers, Orders.reader_id == Readers.id)
+						.outerjoin(ReadersType, Readers.reader_type_id == ReadersType.id)
+						.filter(done_column <= upper)
+					)
+					if since is not None:
+						query = query.filter(done_column > since)
+					for done_at, previous_at, *groups in query.yield_per(1000):
+						bucket = dwell_bucket(self._seconds_between(previous_at, done_at))
+						for dimension, group in zip(self.ANALYTICS_DIMENSIONS, groups):
+							counts[(done_at.date(), stage, dimension, group or '', bucket)] += 1
+
+				if counts:
+					days = {key[0] for key in counts}
+					existing = {
+						(row.day, row.stage, row.dimension, row.group_value, row.bucket): row
+						for row in session.query(WorkflowRollups).filter(
+							WorkflowRollups.day.in_(days)
+						)
+					}
+					for key, count in counts.items():
+						row = existing.get(key)
+						if row is None:
+							day, stage, dimension, group, bucket = key
+							session.add(
+								WorkflowRollups(
+									day=day,
+									stage=stage,
+									dimension=dimension,
+									group_value=group,
+									bucket=bucket,
+									count=count,
+								)
+							)
+						else:
+							row.count += count
+
+				if state is None:
+					state = AppState(key=self.ROLLUP_WATERMARK_KEY)
+					session.add(state)
+				state.value = upper.isoformat()
+			self._rollups_refreshed_at = time.monotonic()
+
+		added = sum(counts.values()) // len(self.ANALYTICS_DIMENSIONS)
+		logging.info(f'Workflow rollups refreshed up to {upper}: {added} transitions added')
+		return added
+
+	def get_workflow_analytics(
+		self,
+		group_by: str = 'product_family',
+		start_date: date | None = None,
+		end_date: date | None = None,
+	) -> dict:
+		"""
+		Daily throughput and dwell time percentiles of each workflow stage.
+
+		`throughput` has the number of orders that reached each stage per day and
+		group; `dwell` has, per stage and group, the p50 and p95 time in seconds
+		the orders waited since the previous stage (since creation for mount).
+		Percentiles are estimated from the DWELL_BUCKETS histogram. Both come from
+		`workflow_rollups`, refreshed first if older than ROLLUP_REFRESH_INTERVAL.
+
+		Raises:
+		    ValueError: If `group_by` is invalid
+		"""
+		if group_by not in self.ANALYTICS_DIMENSIONS:
+			raise ValueError(
+				f"Invalid group '{group_by}'. Use one of {tuple(self.ANALYTICS_DIMENSIONS)}"
+			)
+		if time.monotonic() - self._rollups_refreshed_at >= self.ROLLUP_REFRESH_INTERVAL:
+			self.refresh_workflow_rollups()
+
+		end_date = end_date or date.today()
+		start_date = start_date or end_date - timedelta(days=30)
+		with self.db_manager.get_session() as session:
+			rows = (
+				session.query(
+					WorkflowRollups.day,
+					WorkflowRollups.stage,
+					WorkflowRollups.group_value,
+					WorkflowRollups.bucket,
+					WorkflowRollups.count,
+				)
+				.filter(
+					WorkflowRollups.dimension == group_by,
+					WorkflowRollups.day >= start_date,
+					WorkflowRollups.day <= end_date,
+				)
+				.all()
+			)
+
+		throughput = Counter()
+		histograms = defaultdict(Counter)
+		for day, stage, group, bucket, count in rows:
+			throughput[(day, stage, group)] += count
+			histograms[(stage, group)][bucket] += count
+
+		stages = list(self.WORKFLOW_STAGES)
+		return {
+			'group_by': group_by,
+			'start_date': start_date.isoformat(),
+			'end_date': end_date.isoformat(),
+			'throughput': [
+				{'day': day.isoformat(), 'stage': stage, 'group': group, 'count': count}
+				for (day, stage, group), count in sorted(
+					throughput.items(),
+					key=lambda item: (item[0][0], stages.index(item[0][1]), item[0][2]),
+				)
+			],
+			'dwell': [
+				{
+					'stage': stage,
+					'group': group,
+					'count': sum(histogram.values()),
+					'p50_seconds': percentile(histogram, 0.5),
+					'p95_seconds': percentile(histogram, 0.95),
+				}
+				for (stage, group), histogram in sorted(
+					histograms.items(), key=lambda item: (stages.index(item[0][0]), item[0][1])
+				)
+			],
+			'buckets_seconds': list(DWELL_BUCKETS),
+		}
+
+	# [ TYPEAHEAD ]
+	def _typeahead_index(self, field: str) -> TypeaheadIndex:
+		"""Index of a typeahead field, loaded from the database on first use."""
+		with self._typeahead_lock:
+			index = self._typeahead.get(field)
+			if index is None:
+				column, normalize = self.TYPEAHEAD_FIELDS[field]
+				index = TypeaheadIndex(normalize)
+				index.rebuild(self._get_column_values(Orders, column))
+				self._typeahead[field] = index
+				logging.info(f'Typeahead index {field} built with {len(index)} values')
+			return index
+
+	def typeahead(self, field: str, query: str, limit: int = 20) -> list:
+		"""
+		Values of a lookup list (see TYPEAHEAD_FIELDS) matching `query`, best first.
+
+		Raises:
+		    ValueError: If the field is invalid
+		"""
+		if field not in self.TYPEAHEAD_FIELDS:
+			raise ValueError(f"Invalid field '{field}'. Use one of {tuple(self.TYPEAHEAD_FIELDS)}")
+		return self._typeahead_index(field).search(query, limit)
+
+	def _typeahead_add(self, order: dict):
+		"""Add the values of a new order to the indexes already built."""
+		with self._typeahead_lock:
+			indexes = dict(self._typeahead)
+		for field, index in indexes.items():
+			column, _ = self.TYPEAHEAD_FIELDS[field]
+			index.add([order.get(column)])
+
+	def _typeahead_reset(self):
+		"""Drop the indexes, they are rebuilt on the next search."""
+		with self._typeahead_lock:
+			self._typeahead.clear()
+
+	# [ FULL-TEXT ]
+	def _fulltext_index(self) -> InvertedIndex:
+		"""Inverted index of FULLTEXT_FIELDS, loaded from the database on first use."""
+		with self._fulltext_lock:
+			if self._fulltext is None:
+				index = InvertedIndex(self.FULLTEXT_FIELDS)
+				columns = [getattr(Orders, field) for field in self.FULLTEXT_FIELDS]
+				with self.db_manager.get_session() as session:
+					for order_id, *values in session.query(Orders.id, *columns).yield_per(1000):
+						index.set(order_id, dict(zip(self.FULLTEXT_FIELDS, values)))
+				self._fulltext = index
+				logging.info(f'Full-text index built with {len(index)} orders')
+			return self._fulltext
+
+	def _fulltext_ranking(self, session, query: str, limit: int) -> list[tuple[int, float]]:
+		"""(order id, score) best first, from MySQL FULLTEXT or the in-memory index."""
+		if session.get_bind().dialect.name != 'mysql':
+			return self._fulltext_index().search(query, limit)
+		columns = [getattr(Orders, field) for field in self.FULLTEXT_FIELDS]
+		score = match(*columns, against=query).in_natural_language_mode()
+		rows = (
+			session.query(Orders.id, score)
+			.filter(score > 0)
+			.order_by(score.desc(), Orders.id.desc())
+			.limit(limit)
+			.all()
+		)
+		return [(order_id, float(value)) for order_id, value in rows]
+
+	def search_product_orders_text(self, query: str, limit: int = 50) -> list[dict]:
+		"""
+		Product orders whose description, family or comments match `query`, best first.
+
+		Uses the MySQL FULLTEXT index (`ix_orders_fulltext`) when available and an
+		in-memory inverted index otherwise. Each result has the `order`, its
+		`score` and `highlights`: the matching fields as HTML with the query words
+		in <mark>.
+
+		Raises:
+		    ValueError: If the query has no searchable word
+		"""
+		terms = set(tokenize(query))
+		if not terms:
+			raise ValueError('Query must have at least one word with 2 or more characters')
+		with self.db_manager.get_session() as session:
+			ranking = self._fulltext_ranking(session, query, limit)
+			ids = [order_id for order_id, _ in ranking]
+			rows = (
+				self._product_orders_query(session).filter(Orders.id.in_(ids)).all() if ids else []
+			)
+			orders = {order['id']: order for order in map(self._decode_product_order, rows)}
+
+		results = []
+		for order_id, score in ranking:
+			order = orders.get(order_id)
+			if order is None:
+				continue
+			highlights = {}
+			for field in self.FULLTEXT_FIELDS:
+				fragment = highlight(order.get(field), terms)
+				if fragment:
+					highlights[field] = fragment
+			results.append({'order': order, 'score': round(score, 4), 'highlights': highlights})
+		logging.debug(f'Full-text search {query!r}: {len(results)} orders')
+		return results
+
+	def _fulltext_set(self, order_id: int, **fields):
+		"""Index an order in the in-memory index, if it was already built."""
+		if self._fulltext is not None:
+			self._fulltext.set(order_id, fields)
+
+	def _fulltext_reset(self):
+		"""Drop the in-memory index, it is rebuilt on the next search."""
+		with self._fulltext_lock:
+			self._fulltext = None
+
+	# [ CACHED LOOKUPS ]
+	def get_customers(self):
+		return self.lookup_cache.get_or_load('customers', super().get_customers)
+
+	def get_cnpjs(self):
+		return self.lookup_cache.get_or_load('cnpjs', super().get_cnpjs)
+
+	def get_orders_numbers(self):
+		return self.lookup_cache.get_or_load('orders_numbers', super().get_orders_numbers)
+
+	def get_product_codes(self):
+		return self.lookup_cache.get_or_load('product_codes', super().get_product_codes)
+
+	def get_reader_types(self):
+		return self.lookup_cache.get_or_load('reader_types', super().get_reader_types)
+
+	def get_readers(self, filters: dict | None = None):
+		if filters:
+			return super().get_readers(filters)
+		return self.lookup_cache.get_or_load('readers', super().get_readers)
+
+	# [ APP STATE ]
+	def get_state(self, key: str) -> str | None:
+		"""Value stored in `app_state` under `key`, None if unset."""
+		with self.db_manager.get_session() as session:
+			state = session.get(AppState, key)
+			return state.value if state else None
+
+	def set_state(self, key: str, value: str | None):
+		"""Store `value` in `app_state` under `key`."""
+		with self.db_manager.get_session() as session:
+			state = session.get(AppState, key)
+			if state is None:
+				session.add(AppState(key=key, value=value))
+			else:
+				state.value = value
+
+	# [ VERSIONS ]
+	def get_tables_version(self, tables: tuple) -> str:
+		"""
+		Opaque version of the given tables, changes whenever one of their rows does.
+
+		Combines the writes counted by this process with a version read from the
+		database, so writes from other processes are seen too. Every order write
+		is logged in `order_changes`, so the orders version is its max(id), read
+		from the primary key; the other tables hold a few hundred rows at most and
+		use max(id) and max(updated_at).
+		"""
+		parts = []
+		with self._changes_lock:
+			parts.extend(str(self._changes[table]) for table in tables)
+		with self.db_manager.get_session() as session:
+			for table in tables:
+				if table == 'orders':
+					parts.append(str(session.query(func.max(OrderChanges.id)).scalar()))
+					continue
+				model = self.TABLES[table]
+				max_id, max_updated = session.query(
+					func.max(model.id), func.max(model.updated_at)
+				).one()
+				parts.extend((str(max_id), str(max_updated)))
+		return ':'.join(parts)
+
+	def get_orders_version(self) -> str:
+		return self.get_tables_version(self.ORDER_LIST_TABLES)
+
+	def get_readers_version(self) -> str:
+		return self.get_tables_version(self.READER_LIST_TABLES)
+
+	# [ WRITES ]
+	# Every write bumps the change counter of its table and drops the lookup
+	# lists it may have made stale
+	def _after_write(self, table: str, *lookups: str):
+		with self._changes_lock:
+			self._changes[table] += 1
+		if lookups:
+			self.lookup_cache.invalidate(*lookups)
+
+	def _orders_changed(self, action: str, order_ids: list[int]):
+		"""
+		Record the change of each order in `order_changes` and publish an
+		`order_changed` event with its version and current state.
+
+		A bulk write of more orders than a subscriber's queue holds would only
+		overflow it, so a single `resync` event is published instead, without
+		loading the orders.
+		"""
+		if not order_ids:
+			return
+		try:
+			with self.db_manager.get_session() as session:
+				changes = [OrderChanges(order_id=order_id, action=action) for order_id in order_ids]
+				session.add_all(changes)
+				session.flush()
+				versions = {change.order_id: change.id for change in changes}
+		except Exception as e:
+			logging.error(f'Error recording product order changes: {e}')
+			versions = {}
+
+		if not self.order_events.has_subscribers:
+			return
+		if len(order_ids) > self.order_events.queue_size:
+			self.order_events.publish('resync', {})
+			return
+		orders = {}
+		if action != 'deleted':
+			try:
+				with self.db_manager.get_session() as session:
+					for start in range(0, len(order_ids), self.IN_CHUNK_SIZE):
+						chunk = order_ids[start : start + self.IN_CHUNK_SIZE]
+						rows = (
+							self._product_orders_query(session).filter(Orders.id.in_(chunk)).all()
+						)
+						orders.update((row[0].id, self._decode_product_order(row)) for row in rows)
+			except Exception as e:
+				logging.error(f'Error loading changed product orders: {e}')
+				return
+		for order_id in order_ids:
+			self.order_events.publish(
+				'order_changed',
+				{
+					'action': action,
+					'version': versions.get(order_id),
+					'order': orders.get(order_id, {'id': order_id}),
+				},
+			)
+
+	def add_product_order(
+		self,
+		order_number: int,
+		client_name: str,
+		client_cnpj: str | None,
+		product_code: str,
+		product_description: str | None,
+		product_family: str | None,
+		reader_id: int | None = None,
+		created_by: int | None = None,
+	):
+		success, result = super().add_product_order(
+			order_number=order_number,
+			client_name=client_name,
+			client_cnpj=client_cnpj,
+			product_code=product_code,
+			product_description=product_description,
+			product_family=product_family,
+			reader_id=reader_id,
+			created_by=created_by,
+		)
+		self._after_write('orders', *self.ORDER_LOOKUPS)
+		if success:
+			self._typeahead_add(
+				{
+					'client_name': client_name,
+					'client_cnpj': client_cnpj,
+					'order_number': order_number,
+					'product_code': product_code,
+				}
+			)
+			self._fulltext_set(
+				result,
+				product_description=product_description,
+				product_family=product_family,
+				comments=None,
+			)
+			self._orders_changed('created', [result])
+		return success, result
+
+	def bulk_add_product_orders(
+		self,
+		orders: list[dict],
+		batch_size: int = 500,
+		on_batch: Callable[[int, int], None] | None = None,
+	) -> tuple[list[int], list[dict]]:
+		"""
+		Insert many product orders, `batch_size` rows per transaction.
+
+		Each dict has the keyword arguments of `add_product_order` without
+		reader_id and created_by, as for orders imported from Omie. A batch that
+		fails is retried row by row, so only the bad rows are rejected.
+		`on_batch(inserted, rejected)` is called with the running totals after
+		each batch.
+
+		Returns:
+		    (ids of the inserted orders, [{'order_number', 'error'}] of the rejected ones)
+		"""
+		inserted: list[tuple[int, dict]] = []
+		errors = []
+		for start in range(0, len(orders), batch_size):
+			batch = orders[start : start + batch_size]
+			try:
+				inserted.extend(zip(self._insert_product_orders(batch), batch))
+			except Exception as e:
+				logging.warning(
+					f'Batch of {len(batch)} product orders failed, retrying per row: {e}'
+				)
+				for order in batch:
+					try:
+						inserted.extend(zip(self._insert_product_orders([order]), [order]))
+					except Exception as e:
+						errors.append({'order_number': order.get('order_number'), 'error': str(e)})
+			if on_batch:
+				on_batch(len(inserted), len(errors))
+		logging.info(
+			f'Bulk insert of product orders: {len(inserted)} inserted, {len(errors)} failed'
+		)
+
+		if inserted:
+			self._after_write('orders', *self.ORDER_LOOKUPS)
+			for order_id, order in inserted:
+				self._typeahead_add(order)
+				self._fulltext_set(
+					order_id,
+					product_description=order.get('product_description'),
+					product_family=order.get('product_family'),
+					comments=None,
+				)
+			self._orders_changed('created', [order_id for order_id, _ in inserted])
+		return [order_id for order_id, _ in inserted], errors
+
+	def _insert_product_orders(self, orders: list[dict]) -> list[int]:
+		"""Insert the orders in one transaction and return their ids."""
+		with self.db_manager.get_session() as session:
+			rows = [Orders(**order) for order in orders]
+			session.add_all(rows)
+			session.flush()
+			return [row.id for row in rows]
+
+	def update_product_order(self, order_id: int, **kwargs):
+		# Used by the workflow methods, which publish their own event
+		result = super().update_product_order(order_id, **kwargs)
+		self._after_write('orders', *self.ORDER_LOOKUPS)
+		if any(column in kwargs for column, _ in self.TYPEAHEAD_FIELDS.values()):
+			self._typeahead_reset()
+		if any(field in kwargs for field in self.FULLTEXT_FIELDS):
+			self._fulltext_reset()
+		return result
+
+	def delete_product_order(self, order_id: int):
+		success, result = super().delete_product_order(order_id)
+		self._after_write('orders', *self.ORDER_LOOKUPS)
+		# The order's reader, if any, is free again
+		self._after_write('readers', 'readers')
+		if success:
+			self._typeahead_reset()
+			if self._fulltext is not None:
+				self._fulltext.remove(order_id)
+			self._orders_changed('deleted', [order_id])
+		return success, result
+
+	def add_reader_to_product_order(self, order_id: int, reader_id: int):
+		success, result = super().add_reader_to_product_order(order_id, reader_id)
+		self._after_write('orders')
+		self._after_write('readers', 'readers')
+		if success:
+			self._orders_changed('assign', [order_id])
+		return success, result
+
+	def add_comment_to_product_order(self, order_id: int, comment: str, user: str | None = None):
+		success, result = super().add_comment_to_product_order(order_id, comment, user)
+		self._after_write('orders')
+		if success:
+			if self._fulltext is not None:
+				# `result` is the comment as stored, with its timestamp and user
+				self._fulltext.append(order_id, 'comments', result)
+			self._orders_changed('comment', [order_id])
+		return success, result
+
+	def product_order_mount(self, order_id: int, mounted_by: int):
+		success, result = super().product_order_mount(order_id, mounted_by)
+		self._after_write('orders')
+		if success:
+			self._orders_changed('mount', [order_id])
+		return success, result
+
+	def product_order_test(self, order_id: int, tested_by: int):
+		success, result = super().product_order_test(order_id, tested_by)
+		self._after_write('orders')
+		if success:
+			self._orders_changed('test', [order_id])
+		return success, result
+
+	def product_order_ship(self, order_id: int, shipped_by: int):
+		success, result = super().product_order_ship(order_id, shipped_by)
+		self._after_write('orders')
+		if success:
+			self._orders_changed('ship', [order_id])
+		return success, result
+
+	def product_order_activate(self, order_id: int, activated_by: int):
+		success, result = super().product_order_activate(order_id, activated_by)
+		self._after_write('orders')
+		if success:
+			self._orders_changed('activate', [order_id])
+		return success, result
+
+	def add_reader_type(self, *args, **kwargs):
+		result = super().add_reader_type(*args, **kwargs)
+		self._after_write('reader_types', *self.READER_LOOKUPS)
+		return result
+
+	def update_reader_type(self, *args, **kwargs):
+		result = super().update_reader_type(*args, **kwargs)
+		self._after_write('reader_types', *self.READER_LOOKUPS)
+		return result
+
+	def delete_reader_type(self, *args, **kwargs):
+		result = super().delete_reader_type(*args, **kwargs)
+		self._after_write('reader_types', *self.READER_LOOKUPS)
+		return result
+
+	def add_reader(self, *args, **kwargs):
+		result = super().add_reader(*args, **kwargs)
+		self._after_write('readers', 'readers')
+		return result
+
+	def update_reader(self, *args, **kwargs):
+		result = super().update_reader(*args, **kwargs)
+		self._after_write('readers', 'readers')
+		return result
+
+	def delete_reader(self, *args, **kwargs):
+		result = super().delete_reader(*args, **kwargs)
+		self._after_write('readers', 'readers')
+		return result
+
+	def add_user(self, *args, **kwargs):
+		result = super().add_user(*args, **kwargs)
+		self._after_write('users')
+		return result
+
+	def update_user(self, *args, **kwargs):
+		result = super().update_user(*args, **kwargs)
+		self._after_write('users')
+		return result
+
+	def delete_user(self, *args, **kwargs):
+		result = super().delete_user(*args, **kwargs)
+		self._after_write('users')
+		return result
+
+	def delete_user_by_username(self, *args, **kwargs):
+		result = super().delete_user_by_username(*args, **kwargs)
+		self._after_write('users')
+		return result
@@ -0,0 +1,55 @@
+import asyncio
+import itertools
+import threading
+
+
+class OrderEvents:
+	"""
+	In-process publish/subscribe of product order changes.
+
+	Each subscriber owns a bounded asyncio.Queue on its event loop. `publish` is
+	thread-safe, so the database worker threads can call it directly. A
+	subscriber that falls `queue_size` events behind gets its queue replaced by
+	a single `resync` event and should reload its data.
+	"""
+
+	def __init__(self, queue_size: int = 100):
+		self.queue_size = queue_size
+		self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+		self._lock = threading.Lock()
+		self._sequence = itertools.count(1)
+
+	@property
+	def has_subscribers(self) -> bool:
+		return bool(self._subscribers)
+
+	def subscribe(self) -> asyncio.Queue:
+		"""Register a new subscriber. Must be called from its event loop."""
+		queue = asyncio.Queue(maxsize=self.queue_size)
+		with self._lock:
+			self._subscribers[queue] = asyncio.get_running_loop()
+		return queue
+
+	def unsubscribe(self, queue: asyncio.Queue):
+		with self._lock:
+			self._subscribers.pop(queue, None)
+
+	def publish(self, event: str, data: dict):
+		"""Send an event to every subscriber."""
+		message = {'id': next(self._sequence), 'event': event, 'data': data}
+		with self._lock:
+			subscribers = list(self._subscribers.items())
+		for queue, loop in subscribers:
+			try:
+				loop.call_soon_threadsafe(self._deliver, queue, message)
+			except RuntimeError:
+				# Loop already closed
+				self.unsubscribe(queue)
+
+	def _deliver(self, queue: asyncio.Queue, message: dict):
+		try:
+			queue.put_nowait(message)
+		except asyncio.QueueFull:
+			while not queue.empty():
+				queue.get_nowait()
+			queue.put_nowait({'id': message['id'], 'event': 'resync', 'data': {}})
@@ -0,0 +1,121 @@
+import html
+import math
+import re
+import threading
+from collections import defaultdict
+
+from .typeahead import normalize_text
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text) -> list[str]:
+	"""Normalized words of `text` with at least 2 characters."""
+	if not text:
+		return []
+	return [word for word in WORD_RE.findall(normalize_text(text)) if len(word) >= 2]
+
+
+def highlight(text: str | None, terms: set[str], context: int = 60) -> str | None:
+	"""
+	HTML-escaped `text` with each word found in `terms` wrapped in <mark>.
+
+	Long texts are cut to `context` characters around the first match. Returns
+	None when no word matches.
+	"""
+	if not text:
+		return None
+	matches = [m for m in WORD_RE.finditer(text) if normalize_text(m.group()) in terms]
+	if not matches:
+		return None
+
+	start, end = 0, len(text)
+	if len(text) > context * 2:
+		start = max(0, matches[0].start() - context)
+		end = min(len(text), matches[0].end() + context)
+
+	parts = ['…' if start > 0 else '']
+	position = start
+	for match in matches:
+		if match.start() < start or match.end() > end:
+			continue
+		parts.append(html.escape(text[position : match.start()]))
+		parts.append(f'<mark>{html.escape(match.group())}</mark>')
+		position = match.end()
+	parts.append(html.escape(text[position:end]))
+	parts.append('…' if end < len(text) else '')
+	return ''.join(parts)
+
+
+class InvertedIndex:
+	"""
+	In-memory inverted index with TF-IDF ranking.
+
+	Used for full-text search when the database has no FULLTEXT support
+	(SQLite). Documents are indexed per field, and a field weight multiplies
+	its term frequencies.
+	"""
+
+	def __init__(self, weights: dict[str, float]):
+		self.weights = weights
+		self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+		self._documents: dict[int, dict[str, list[str]]] = {}
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._documents)
+
+	def _add_terms(self, doc_id: int, field: str, terms: list[str]):
+		weight = self.weights.get(field, 1.0)
+		for term in terms:
+			postings = self._postings[term]
+			postings[doc_id] = postings.get(doc_id, 0.0) + weight
+
+	def _remove(self, doc_id: int):
+		document = self._documents.pop(doc_id, None)
+		if not document:
+			return
+		for terms in document.values():
+			for term in set(terms):
+				postings = self._postings.get(term)
+				if postings is not None:
+					postings.pop(doc_id, None)
+					if not postings:
+						del self._postings[term]
+
+	def set(self, doc_id: int, fields: dict[str, str | None]):
+		"""Index a document, replacing any previous version of it."""
+		document = {field: tokenize(text) for field, text in fields.items()}
+		with self._lock:
+			self._remove(doc_id)
+			self._documents[doc_id] = document
+			for field, terms in document.items():
+				self._add_terms(doc_id, field, terms)
+
+	def append(self, doc_id: int, field: str, text: str | None):
+		"""Add text to a field of a document (e.g. a new comment)."""
+		terms = tokenize(text)
+		with self._lock:
+			document = self._documents.setdefault(doc_id, {})
+			document.setdefault(field, []).extend(terms)
+			self._add_terms(doc_id, field, terms)
+
+	def remove(self, doc_id: int):
+		with self._lock:
+			self._remove(doc_id)
+
+	def search(self, query: str, limit: int = 50) -> list[tuple[int, float]]:
+		"""(doc_id, score) of the documents matching any query term, best first."""
+		terms = set(tokenize(query))
+		scores: dict[int, float] = defaultdict(float)
+		with self._lock:
+			total = len(self._documents) or 1
+			for term in terms:
+				postings = self._postings.get(term)
+				if not postings:
+					continue
+				idf = math.log(1 + total / len(postings))
+				for doc_id, frequency in postings.items():
+					scores[doc_id] += frequency * idf
+		ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+		return ranked[:limit]
@@ -1,58 +1,213 @@
-from smartx_rfid.smtx_db.main import SmtxDb
-from smartx_rfid.api.omie import ApiOmie
+import asyncio
+import json
+import time
+from datetime import datetime
 from app.core import settings
+from app.models.orders import omie_hash
+from .async_db import AsyncDb
+from .db import ControllerDb
+from .omie import OmieClient
+from .sync_job import SyncJob
 import logging
 
+OMIE_WATERMARK_KEY = 'omie_sync.watermark'
+OMIE_LAST_RUN_KEY = 'omie_sync.last_run'
+
 
 class Controller:
 	def __init__(self, db_url: str | None = None):
 		self.db_url = db_url
-		self.db_manager = SmtxDb(db_url)
+		self.db_manager = ControllerDb(
+			db_url, cache_ttl=settings.LOOKUP_CACHE_TTL, cache_size=settings.LOOKUP_CACHE_SIZE
+		)
+		# Async access to db_manager, routes must use this one to keep the event loop free
+		self.db = AsyncDb(self.db_manager, max_workers=settings.DB_WORKERS)
+		self.order_events = self.db_manager.order_events
 		if settings.APP_KEY is None or settings.APP_SECRET is None:
 			raise ValueError('APP_KEY and APP_SECRET must be set in the configuration.')
-		self.omie_api = ApiOmie(app_key=settings.APP_KEY, app_secret=settings.APP_SECRET)
+		self.omie_api = OmieClient(
+			app_key=settings.APP_KEY,
+			app_secret=settings.APP_SECRET,
+			base_url=settings.OMIE_BASE_URL,
+			concurrency=settings.OMIE_CONCURRENCY,
+			rate_limit=settings.OMIE_RATE_LIMIT,
+			max_retries=settings.OMIE_MAX_RETRIES,
+		)
+		# Current or last sync, see `start_omie_sync`
+		self._sync_job: SyncJob | None = None
+		# Set by the scheduled sync task (app/async_func/omie_sync.py)
+		self.next_sync_at: datetime | None = None
+
+	def start_omie_sync(self, full: bool = False, trigger: str = 'manual') -> SyncJob:
+		"""
+		Start synchronizing with Omie in the background and return the job.
+
+		Only one sync runs at a time: a call made while another is running gets
+		the running job (whatever its `full`). Only the last job is kept, see
+		`get_sync_job`; its outcome is also stored under OMIE_LAST_RUN_KEY.
+		"""
+		job = self._sync_job
+		if job is None or job.done:
+			job = SyncJob(full, trigger)
+			job.task = asyncio.create_task(self._run_sync(job))
+			self._sync_job = job
+		else:
+			logging.info(f'Omie sync {job.id} already running, {trigger} trigger attaches to it')
+		return job
+
+	async def sincronize_omie(self, full: bool = False, trigger: str = 'manual'):
+		"""Insert the Omie orders missing locally, waiting for the sync to end."""
+		job = self.start_omie_sync(full, trigger)
+		return await asyncio.shield(job.task)
+
+	def get_sync_job(self, job_id: str) -> SyncJob | None:
+		"""The current or last sync job if it has this id."""
+		job = self._sync_job
+		return job if job is not None and job.id == job_id else None
 
-	async def sincronize_omie(self):
-		# Synchronize all data with Omie
+	async def _run_sync(self, job: SyncJob):
+		start = time.perf_counter()
+		success, data = await self._sincronize_omie(job)
+		if success:
+			job.finish(result=data)
+		else:
+			job.finish(error=data)
+		last_run = {
+			'trigger': job.trigger,
+			'full': job.full,
+			'started_at': job.started_at.isoformat(),
+			'duration_seconds': round(time.perf_counter() - start, 3),
+			'success': success,
+		}
+		if success:
+			last_run['new_orders_inserted'] = data['new_orders_inserted']
+			last_run['rows_updated'] = data['rows_updated']
+			last_run['errors'] = len(data['errors'])
+			last_run['all_orders_fetched'] = data['all_orders_fetched']
+		else:
+			last_run['error'] = data
+		logging.info(f'Omie sync finished: {last_run}')
 		try:
-			result = await self.omie_api.get_all_orders()
+			await self.db.set_state(OMIE_LAST_RUN_KEY, json.dumps(last_run))
+		except Exception as e:
+			logging.error(f'Error saving the Omie sync status: {e}')
+		return success, data
+
+	async def get_sync_status(self) -> dict:
+		"""
+		Whether a sync is running, the current or last job since startup, when
+		the next scheduled sync is due and the last run.
+		"""
+		last_run = await self.db.get_state(OMIE_LAST_RUN_KEY)
+		job = self._sync_job
+		return {
+			'running': job is not None and not job.done,
+			'job': job.to_dict() if job else None,
+			'next_run_at': self.next_sync_at.isoformat() if self.next_sync_at else None,
+			'last_run': json.loads(last_run) if last_run else None,
+		}
+
+	async def _sincronize_omie(self, job: SyncJob):
+		"""
+		Only the orders changed in Omie since the last successful sync are
+		fetched (see OMIE_WATERMARK_KEY). `job.full` ignores the watermark and
+		reconciles against every order in Omie. Progress is reported on `job`.
+		"""
+		try:
+			started_at = datetime.now()
+			watermark = None if job.full else await self.db.get_state(OMIE_WATERMARK_KEY)
+			since = datetime.fromisoformat(watermark) if watermark else None
+			result = await self.omie_api.get_orders_since(since, on_page=job.page_fetched)
+			job.set_phase('comparing')
 			success = result.get('success', False)
 			total_items = result.get('total_items', 0)
 			orders = result.get('orders', [])
-			orders_db = self.db_manager.get_product_orders()
-			orders_db_dict = {order.get('order_number'): order for order in orders_db}
-			to_insert = []
-			errors = []
+			# Rows of each Omie order, in Omie order
+			omie_orders: dict[int, list[dict]] = {}
 			for order in orders:
-				order_db = orders_db_dict.get(order.get('numero_pedido'))
-				if not order_db:
-					to_insert.append(order)
+				omie_orders.setdefault(order.get('numero_pedido'), []).append(
+					{
+						'order_number': order.get('numero_pedido'),
+						'client_name': order.get('nome_cliente'),
+						'client_cnpj': order.get('cnpj_cliente'),
+						'product_code': order.get('codigo_produto'),
+						'product_description': order.get('descricao_produto'),
+						'product_family': order.get('familia_produto'),
+					}
+				)
+
+			# Only the incoming numbers are looked up, never the whole table
+			local = await self.db.get_omie_hashes(list(omie_orders))
+			to_insert, to_update, conflicts = [], [], []
+			for order_number, rows in omie_orders.items():
+				content_hash = omie_hash(rows)
+				current = local.get(order_number)
+				if current is None:
+					to_insert.extend({**row, 'omie_hash': content_hash} for row in rows)
+					continue
+				if current['hash'] == content_hash:
+					continue
+				if len(current['ids']) != len(rows):
+					# Items added or removed in Omie: rows may already be in the workflow
+					conflicts.append(
+						{
+							'order_number': order_number,
+							'error': f'Order has {len(rows)} items in Omie and {len(current["ids"])} locally',
+						}
+					)
+					continue
+				to_update.extend(
+					{**row, 'id': order_id, 'omie_hash': content_hash}
+					for order_id, row in zip(current['ids'], rows)
+				)
 
 			logging.info(
-				f'Fetched {total_items} orders from Omie. {to_insert} new orders to insert into the database.'
+				f'Fetched {total_items} orders from Omie. {len(to_insert)} new rows to insert, '
+				f'{len(to_update)} rows to update, {len(conflicts)} conflicts.'
 			)
 
-			for order in to_insert:
-				success, message = self.db_manager.add_product_order(
-					order_number=order.get('numero_pedido'),
-					client_name=order.get('nome_cliente'),
-					client_cnpj=order.get('cnpj_cliente'),
-					product_code=order.get('codigo_produto'),
-					product_description=order.get('descricao_produto'),
-					product_family=order.get('familia_produto'),
-				)
-				if not success:
-					logging.error(f'Error inserting order {order.get("numero_pedido")}: {message}')
-					errors.append({'order_number': order.get('numero_pedido'), 'error': message})
-				logging.info(
-					f'Inserting order {order.get("numero_pedido")}: success={success}, message={message}'
+			job.rows_to_insert, job.rows_to_update = len(to_insert), len(to_update)
+			job.errors = len(conflicts)
+
+			def on_insert(done: int, failed: int):
+				job.rows_inserted = done
+				job.errors = len(conflicts) + failed
+
+			job.set_phase('inserting')
+			insert_started = time.perf_counter()
+			inserted, errors = await self.db.bulk_add_product_orders(
+				to_insert, batch_size=settings.SYNC_BATCH_SIZE, on_batch=on_insert
+			)
+			insert_seconds = time.perf_counter() - insert_started
+
+			def on_update(done: int, failed: int):
+				job.rows_updated = done
+				job.errors = len(conflicts) + len(errors) + failed
+
+			job.set_phase('updating')
+			updated, update_errors = await self.db.bulk_update_omie_fields(
+				to_update, batch_size=settings.SYNC_BATCH_SIZE, on_batch=on_update
+			)
+			errors += update_errors
+			for error in errors + conflicts:
+				logging.error(
+					f'Error synchronizing order {error["order_number"]}: {error["error"]}'
 				)
 
+			# Failed rows are retried by the next sync, conflicts need a person
+			if success and not errors:
+				await self.db.set_state(OMIE_WATERMARK_KEY, started_at.isoformat())
+
 			return True, {
+				'mode': 'full' if since is None else 'incremental',
+				'since': since.isoformat() if since else None,
 				'all_orders_fetched': success,
 				'total_items_fetched': total_items,
-				'new_orders_inserted': len(to_insert),
-				'errors': errors,
+				'new_orders_inserted': len(inserted),
+				'insert_seconds': round(insert_seconds, 3),
+				'rows_per_second': round(len(inserted) / insert_seconds) if insert_seconds else 0,
+				'rows_updated': len(updated),
+				'errors': errors + conflicts,
 			}
 
 		except Exception as e:
@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+import httpx
+from smartx_rfid.api.omie import ApiOmie
+
+
+class TokenBucket:
+	"""
+	Asyncio token bucket: `rate` requests per second on average, with bursts of
+	up to `capacity` (by default requests are evenly spaced).
+	"""
+
+	def __init__(self, rate: float, capacity: int = 1):
+		self.rate = rate
+		self.capacity = capacity
+		self._tokens = float(self.capacity)
+		self._updated = time.monotonic()
+		self._lock = asyncio.Lock()
+
+	def _refill(self):
+		now = time.monotonic()
+		self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+		self._updated = now
+
+	async def acquire(self):
+		"""Wait for a token."""
+		async with self._lock:
+			self._refill()
+			while self._tokens < 1:
+				await asyncio.sleep((1 - self._tokens) / self.rate)
+				self._refill()
+			self._tokens -= 1
+
+	def drain(self):
+		"""Drop the tokens left, after the server said we are going too fast."""
+		self._tokens = 0
+		self._updated = time.monotonic()
+
+
+class OmieClient(ApiOmie):
+	"""
+	ApiOmie with incremental, concurrent and rate-limited fetching.
+
+	`get_orders_since` asks Omie only for the orders included or changed since
+	a date, and keeps the products and clients used to enrich them in memory,
+	refreshing them with the same date filter, so an incremental sync costs
+	requests proportional to what changed. Omie filters by day, so the
+	results may repeat orders already synchronized that day.
+
+	Every request goes through a token bucket of `rate_limit` requests per
+	second shared by all listings. After the first page, the remaining pages
+	of a listing are fetched `concurrency` at a time. Throttling (HTTP 429,
+	Omie's redundant or blocked consumption faults), gateway errors and
+	network failures are retried with exponential backoff; any other fault
+	fails at once.
+	"""
+
+	PER_PAGE = 100
+	RETRY_STATUS = (429, 502, 503, 504)
+	# Omie answers too many requests with a fault string instead of a 429
+	THROTTLE_FAULTS = ('REDUNDANT', 'MISUSE_API_PROCESS', 'consumo indevido', 'Consumo redundante')
+	# ...and a listing with no records, e.g. nothing changed since the date
+	# filter, with "ERROR: Não existem registros para a página [1]!"
+	EMPTY_PAGE_FAULTS = ('Client-5113', 'Não existem registros')
+
+	def __init__(
+		self,
+		app_key: str,
+		app_secret: str,
+		base_url: str = 'https://app.omie.com.br/api/v1/',
+		concurrency: int = 4,
+		rate_limit: float = 3,
+		max_retries: int = 5,
+	):
+		super().__init__(app_key=app_key, app_secret=app_secret, base_url=base_url)
+		self.concurrency = concurrency
+		self.max_retries = max_retries
+		self.limiter = TokenBucket(rate_limit)
+		self._products: dict[str, dict] = {}
+		self._clients: dict[str, dict] = {}
+		# False until both catalogs were read completely once
+		self._catalogs_synced = False
+
+	@staticmethod
+	def _date_filter(since: datetime | None) -> dict:
+		if since is None:
+			return {}
+		return {'filtrar_por_data_de': since.strftime('%d/%m/%Y')}
+
+	def _is_throttled(self, response: httpx.Response) -> bool:
+		if response.status_code == 429:
+			return True
+		return response.status_code >= 500 and any(
+			fault in response.text for fault in self.THROTTLE_FAULTS
+		)
+
+	def _is_empty_page(self, response: httpx.Response) -> bool:
+		return response.status_code == 500 and any(
+			fault in response.text for fault in self.EMPTY_PAGE_FAULTS
+		)
+
+	def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+		retry_after = response.headers.get('Retry-After') if response is not None else None
+		if retry_after and retry_after.isdigit():
+			return float(retry_after)
+		return min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.0)
+
+	async def _call_api(
+		self, client: httpx.AsyncClient, endpoint: str, payload: dict
+	) -> tuple[bool, dict]:
+		"""Rate-limited call to the Omie API, retrying throttling and gateway errors."""
+		url = f'{self.base_url}{endpoint}/'
+		body = {'app_key': self.app_key, 'app_secret': self.app_secret, **payload}
+		for attempt in range(self.max_retries + 1):
+			await self.limiter.acquire()
+			response = None
+			try:
+				logging.debug(f'[OMIE] Calling {url}')
+				response = await client.post(url, json=body)
+				if response.status_code < 400:
+					return True, response.json()
+				if self._is_empty_page(response):
+					return True, {'total_de_paginas': 0}
+				throttled = self._is_throttled(response)
+				if not throttled and response.status_code not in self.RETRY_STATUS:
+					break
+				if throttled:
+					self.limiter.drain()
+				error = f'HTTP error: {response.status_code}'
+			except (httpx.TransportError, ValueError) as e:
+				error = f'Request failed: {e}'
+			if attempt < self.max_retries:
+				delay = self._backoff(attempt, response)
+				logging.warning(
+					f'[OMIE] {error} on {payload.get("call")}, retrying in {delay:.1f}s'
+				)
+				await asyncio.sleep(delay)
+
+		if response is not None and response.status_code >= 400:
+			logging.error(f'[OMIE] API call failed: {response.status_code} - {response.text}')
+			return False, {
+				'error': f'HTTP error: {response.status_code}',
+				'detail': response.text,
+			}
+		logging.error(f'[OMIE] API call exception: {error}')
+		return False, {'error': 'Request failed', 'detail': error}
+
+	async def _fetch_pages(
+		self,
+		client: httpx.AsyncClient,
+		endpoint: str,
+		call: str,
+		key: str,
+		params: dict,
+		on_page: Callable[[str, int], None] | None = None,
+	) -> tuple[list[dict], bool]:
+		"""
+		Every record of a paginated Omie listing, and whether all pages were read.
+
+		The first page gives `total_de_paginas`; the others are fetched
+		concurrently and returned in page order. `on_page(call, total_pages)` is
+		called after each page read.
+		"""
+
+		async def fetch(page: int) -> tuple[bool, dict]:
+			payload = {
+				'call': call,
+				'param': [{'pagina': page, 'registros_por_pagina': self.PER_PAGE, **params}],
+			}
+			success, data = await self._call_api(client, endpoint, payload)
+			if not success:
+				logging.error(f'[OMIE] Failed to fetch {key} page {page}: {data}')
+			return success, data
+
+		success, first = await fetch(1)
+		if not success:
+			return [], False
+		records = list(first.get(key, []))
+		total_pages = int(first.get('total_de_paginas') or 1)
+		if on_page:
+			on_page(call, total_pages)
+
+		semaphore = asyncio.Semaphore(self.concurrency)
+
+		async def fetch_bounded(page: int) -> tuple[bool, dict]:
+			async with semaphore:
+				result = await fetch(page)
+			if on_page:
+				on_page(call, total_pages)
+			return result
+
+		pages = await asyncio.gather(*(fetch_bounded(page) for page in range(2, total_pages + 1)))
+		complete = True
+		for success, data in pages:
+			complete = complete and success
+			if success:
+				records.extend(data.get(key, []))
+		logging.info(f'[OMIE] {call}: {total_pages} pages, {len(records)} records')
+		return records, complete
+
+	async def _refresh_products(
+		self, client: httpx.AsyncClient, since: datetime | None, on_page=None
+	) -> bool:
+		params = {
+			'apenas_importado_api': 'N',
+			'filtrar_apenas_omiepdv': 'N',
+			**self._date_filter(since),
+		}
+		products, complete = await self._fetch_pages(
+			client, 'geral/produtos', 'ListarProdutos', 'produto_servico_cadastro', params, on_page
+		)
+		for product in products:
+			codigo = product.get('codigo')
+			if codigo:
+				self._products[codigo] = {
+					'codigo': codigo,
+					'descricao': product.get('descricao'),
+					'familia': product.get('descricao_familia') or '',
+				}
+		return complete
+
+	async def _refresh_clients(
+		self, client: httpx.AsyncClient, since: datetime | None, on_page=None
+	) -> bool:
+		clients, complete = await self._fetch_pages(
+			client,
+			'geral/clientes',
+			'ListarClientes',
+			'clientes_cadastro',
+			self._date_filter(since),
+			on_page,
+		)
+		for client_data in clients:
+			codigo = client_data.get('codigo_cliente_omie')
+			if codigo and client_data.get('razao_social'):
+				self._clients[codigo] = {
+					'codigo': codigo,
+					'nome': client_data.get('razao_social'),
+					'cnpj': client_data.get('cnpj_cpf'),
+				}
+		return complete
+
+	async def _fetch_orders(
+		self, client: httpx.AsyncClient, since: datetime | None, on_page=None
+	) -> tuple[list[dict], bool]:
+		"""Order items (one per product) of the orders past the billing stage (etapa >= 20)."""
+		params = {'apenas_importado_api': 'N', **self._date_filter(since)}
+		orders, complete = await self._fetch_pages(
+			client, 'produtos/pedido', 'ListarPedidos', 'pedido_venda_produto', params, on_page
+		)
+		items = []
+		for order in orders:
+			try:
+				cabecalho = order.get('cabecalho', {})
+				etapa = int(cabecalho.get('etapa', 0))
+				if etapa < 20:
+					continue
+				for produto_data in order.get('det', []):
+					items.append(
+						{
+							'numero_pedido': int(cabecalho.get('numero_pedido')),
+							'codigo_cliente': cabecalho.get('codigo_cliente'),
+							'codigo_produto': produto_data.get('produto', {}).get('codigo'),
+							'etapa': etapa,
+						}
+					)
+			except Exception as e:
+				logging.error(f'[OMIE] Erro ao processar pedido: {e}')
+				complete = False
+		return items, complete
+
+	async def get_orders_since(
+		self, since: datetime | None = None, on_page: Callable[[str, int], None] | None = None
+	) -> dict:
+		"""
+		Orders included or changed in Omie since `since` (all orders if None),
+		enriched like `get_all_orders`.
+
+		Products and clients are fetched in full the first time (or when `since`
+		is None, or after a failed fetch) and only their changes afterwards.
+		`on_page(call, total_pages)` is called after each page of any listing.
+		"""
+		catalog_since = since if self._catalogs_synced else None
+		timeout = httpx.Timeout(30.0, connect=10.0)
+		limits = httpx.Limits(max_connections=self.concurrency * 3)
+		async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+			products_ok, clients_ok, (raw_orders, orders_ok) = await asyncio.gather(
+				self._refresh_products(client, catalog_since, on_page),
+				self._refresh_clients(client, catalog_since, on_page),
+				self._fetch_orders(client, since, on_page),
+			)
+
+		self._catalogs_synced = products_ok and clients_ok
+		orders = self._enrich_orders(raw_orders, self._clients, self._products)
+		logging.info(
+			f'[OMIE] {len(orders)} enriched orders since {since.date() if since else "the start"}'
+		)
+		return {
+			'success': products_ok and clients_ok and orders_ok,
+			'total_items': len(orders),
+			'orders': orders,
+		}
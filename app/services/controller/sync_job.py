@@ -0,0 +1,101 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+
+class SyncJob:
+	"""
+	Progress of an Omie sync running in the background.
+
+	The sync advances through the phases fetching -> comparing -> inserting ->
+	updating and ends in done or failed. Counters are updated by the Omie
+	client (pages) and by the database worker threads (rows) as they go, so
+	`to_dict` can be polled at any time.
+	"""
+
+	FINISHED = ('done', 'failed')
+
+	def __init__(self, full: bool, trigger: str):
+		self.id = uuid.uuid4().hex
+		self.full = full
+		self.trigger = trigger
+		self.started_at = datetime.now()
+		self.finished_at: datetime | None = None
+		self.phase = 'fetching'
+		self._phase_started = time.perf_counter()
+		# listing -> (pages fetched, total pages)
+		self._pages: dict[str, tuple[int, int]] = {}
+		self.rows_to_insert = 0
+		self.rows_inserted = 0
+		self.rows_to_update = 0
+		self.rows_updated = 0
+		self.errors = 0
+		self.result: dict | None = None
+		self.error: str | None = None
+		self.task: asyncio.Task | None = None
+
+	@property
+	def done(self) -> bool:
+		return self.phase in self.FINISHED
+
+	@property
+	def pages_fetched(self) -> int:
+		return sum(fetched for fetched, _ in self._pages.values())
+
+	@property
+	def total_pages(self) -> int:
+		return sum(total for _, total in self._pages.values())
+
+	def set_phase(self, phase: str):
+		self.phase = phase
+		self._phase_started = time.perf_counter()
+
+	def page_fetched(self, listing: str, total_pages: int):
+		"""Callback of `OmieClient.get_orders_since`, once per page read."""
+		fetched, _ = self._pages.get(listing, (0, 0))
+		self._pages[listing] = (fetched + 1, total_pages)
+
+	def finish(self, result: dict | None = None, error: str | None = None):
+		self.result = result
+		self.error = error
+		self.finished_at = datetime.now()
+		self.set_phase('failed' if error is not None else 'done')
+
+	def eta_seconds(self) -> float | None:
+		"""
+		Seconds left in the current phase at the rate seen so far in it, None
+		when there is nothing to measure yet.
+		"""
+		if self.phase == 'fetching':
+			done, total = self.pages_fetched, self.total_pages
+		elif self.phase == 'inserting':
+			done, total = self.rows_inserted, self.rows_to_insert
+		elif self.phase == 'updating':
+			done, total = self.rows_updated, self.rows_to_update
+		else:
+			return 0.0 if self.done else None
+		if not done:
+			return None
+		elapsed = time.perf_counter() - self._phase_started
+		return round(elapsed / done * (total - done), 1)
+
+	def to_dict(self) -> dict:
+		return {
+			'id': self.id,
+			'trigger': self.trigger,
+			'full': self.full,
+			'phase': self.phase,
+			'started_at': self.started_at.isoformat(),
+			'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+			'pages_fetched': self.pages_fetched,
+			'total_pages': self.total_pages,
+			'rows_to_insert': self.rows_to_insert,
+			'rows_inserted': self.rows_inserted,
+			'rows_to_update': self.rows_to_update,
+			'rows_updated': self.rows_updated,
+			'errors': self.errors,
+			'eta_seconds': self.eta_seconds(),
+			'result': self.result,
+			'error': self.error,
+		}
@@ -0,0 +1,91 @@
+import bisect
+import re
+import threading
+import unicodedata
+
+
+def normalize_text(value) -> str:
+	"""Lowercase without accents, used to compare names and codes."""
+	text = unicodedata.normalize('NFKD', str(value))
+	return ''.join(c for c in text if not unicodedata.combining(c)).casefold().strip()
+
+
+def normalize_digits(value) -> str:
+	"""Digits only, so '12.345' and '12345' match the same CNPJ."""
+	return re.sub(r'\D', '', str(value))
+
+
+class TypeaheadIndex:
+	"""
+	Sorted in-memory index of a list of values for prefix search.
+
+	Every value is indexed once per word, keyed by the normalized text from
+	that word to the end, so a query matches the start of the value or the
+	start of any of its words ("silva" finds "Joao Silva Ltda"). Lookups are a
+	bisect on the sorted keys.
+	"""
+
+	def __init__(self, normalize=normalize_text):
+		self.normalize = normalize
+		self._keys: list[str] = []
+		self._entries: list[tuple[str, object]] = []
+		self._values: set = set()
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._values)
+
+	def _word_keys(self, value) -> list[str]:
+		text = self.normalize(value)
+		if not text:
+			return []
+		keys = [text]
+		for match in re.finditer(r'[\s\-./]+', text):
+			rest = text[match.end() :]
+			if rest:
+				keys.append(rest)
+		return keys
+
+	def rebuild(self, values):
+		"""Replace the whole index."""
+		entries = sorted((key, value) for value in set(values) for key in self._word_keys(value))
+		with self._lock:
+			self._entries = entries
+			self._keys = [key for key, _ in entries]
+			self._values = {value for _, value in entries}
+
+	def add(self, values):
+		"""Insert new values, keeping the index sorted."""
+		with self._lock:
+			for value in values:
+				if value is None or value in self._values:
+					continue
+				self._values.add(value)
+				for key in self._word_keys(value):
+					index = bisect.bisect_left(self._keys, key)
+					self._keys.insert(index, key)
+					self._entries.insert(index, (key, value))
+
+	def search(self, query: str, limit: int = 20) -> list:
+		"""
+		Values matching `query`: first those that start with it, then those with
+		a word that starts with it, each group in alphabetical order.
+		"""
+		prefix = self.normalize(query)
+		starts, words = [], []
+		seen = set()
+		with self._lock:
+			index = bisect.bisect_left(self._keys, prefix) if prefix else 0
+			while index < len(self._keys) and self._keys[index].startswith(prefix):
+				_, value = self._entries[index]
+				index += 1
+				if value in seen:
+					continue
+				seen.add(value)
+				if self.normalize(value).startswith(prefix):
+					starts.append(value)
+				else:
+					words.append(value)
+				if len(starts) >= limit:
+					break
+		return (starts + words)[:limit]
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Histogram
+
+from app.core import settings
+from app.services import auth_manager
+
+PASSWORD_SECONDS = Histogram(
+	'password_hash_seconds',
+	'Time to hash or verify a password, waiting for a worker included',
+	['operation'],
+	buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+class PasswordHasherPool:
+	"""
+	Runs the Argon2 hashing and verification of `auth_manager` on a dedicated
+	thread pool.
+
+	Each call takes tens of milliseconds of CPU (and 64 MiB of memory), so
+	running it on the event loop froze every other request while many users
+	logged in at once. argon2 releases the GIL, so `max_workers` hashes run in
+	parallel and the rest wait in the pool's queue.
+	"""
+
+	def __init__(self, max_workers: int = 2):
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password')
+
+	async def _run(self, operation: str, func, *args):
+		start = time.perf_counter()
+		try:
+			return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+		finally:
+			PASSWORD_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+
+	async def hash(self, password: str) -> str:
+		"""
+		Raises:
+		    ValueError: If the password is empty or too weak
+		"""
+		return await self._run('hash', auth_manager.hash_password, password)
+
+	async def verify(self, password: str, password_hash: str) -> bool:
+		return await self._run('verify', auth_manager.verify_password, password, password_hash)
+
+
+class LoginLimiter:
+	"""
+	Sliding-window limit of failed logins, with three keys:
+
+	- username and client IP, `max_attempts`: the usual lockout, which only
+	  blocks the client guessing, so nobody can lock an operator out by typing
+	  their username elsewhere
+	- username alone, `max_attempts_per_user`: a looser ceiling against
+	  guessing one password from many IPs. Reaching it does lock the account
+	  out everywhere until the window passes, the price of that protection, so
+	  keep it well above what the operators themselves can mistype
+	- client IP, `max_attempts_per_ip`: one client trying many usernames
+
+	Only failures count, so many operators logging in from the same machine at
+	a shift change are never blocked. A successful login clears its username
+	and IP key only. Used from the event loop only, so there is no lock.
+	"""
+
+	# Stale keys are swept once this many are tracked
+	MAX_KEYS = 10000
+
+	def __init__(
+		self,
+		max_attempts: int = 5,
+		max_attempts_per_user: int = 50,
+		max_attempts_per_ip: int = 20,
+		window: float = 300,
+	):
+		self.max_attempts = max_attempts
+		self.max_attempts_per_user = max_attempts_per_user
+		self.max_attempts_per_ip = max_attempts_per_ip
+		self.window = window
+		self._failures: dict[str, deque[float]] = {}
+
+	def _keys(self, username: str, ip: str) -> tuple[tuple[str, int], ...]:
+		username = username.lower()
+		return (
+			(f'user:{username}|ip:{ip}', self.max_attempts),
+			(f'user:{username}', self.max_attempts_per_user),
+			(f'ip:{ip}', self.max_attempts_per_ip),
+		)
+
+	def _recent(self, key: str, now: float) -> deque[float]:
+		failures = self._failures.get(key, deque())
+		while failures and failures[0] <= now - self.window:
+			failures.popleft()
+		if not failures:
+			self._failures.pop(key, None)
+		return failures
+
+	def retry_after(self, username: str, ip: str) -> float:
+		"""Seconds until this username may be tried again from this IP, 0 if now."""
+		now = time.monotonic()
+		wait = 0.0
+		for key, limit in self._keys(username, ip):
+			failures = self._recent(key, now)
+			if len(failures) >= limit:
+				wait = max(wait, failures[-limit] + self.window - now)
+		return wait
+
+	def failed(self, username: str, ip: str):
+		now = time.monotonic()
+		if len(self._failures) > self.MAX_KEYS:
+			for key in list(self._failures):
+				self._recent(key, now)
+		for key, _ in self._keys(username, ip):
+			self._failures.setdefault(key, deque()).append(now)
+
+	def succeeded(self, username: str, ip: str):
+		key, _ = self._keys(username, ip)[0]
+		self._failures.pop(key, None)
+
+
+password_hasher = PasswordHasherPool(max_workers=settings.PASSWORD_WORKERS)
+login_limiter = LoginLimiter(
+	max_attempts=settings.LOGIN_MAX_ATTEMPTS,
+	max_attempts_per_user=settings.LOGIN_MAX_ATTEMPTS_PER_USER,
+	max_attempts_per_ip=settings.LOGIN_MAX_ATTEMPTS_PER_IP,
+	window=settings.LOGIN_WINDOW,
+)
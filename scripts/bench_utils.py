@@ -0,0 +1,28 @@
+"""
+Latency helpers shared by the benchmark scripts (benchmark_*.py), imported as
+`from bench_utils import ...` since a script's folder is on sys.path.
+"""
+
+import statistics
+
+
+def percentile(values: list[float], p: float) -> float:
+	if not values:
+		return 0.0
+	values = sorted(values)
+	index = min(len(values) - 1, round(p / 100 * (len(values) - 1)))
+	return values[index]
+
+
+def print_latencies(name: str, latencies: list[float], duration: float, digits: int = 1) -> float:
+	"""Print the count, rate and percentiles of `latencies` (seconds), return the rate."""
+	ms = [v * 1000 for v in latencies]
+	rate = len(ms) / duration
+	print(f'📊 {name}: {len(ms)} requests in {duration:.1f}s ({rate:.1f} req/s)')
+	if ms:
+		print(
+			f'   mean={statistics.mean(ms):.{digits}f}ms p50={percentile(ms, 50):.{digits}f}ms '
+			f'p95={percentile(ms, 95):.{digits}f}ms p99={percentile(ms, 99):.{digits}f}ms '
+			f'max={max(ms):.{digits}f}ms'
+		)
+	return rate
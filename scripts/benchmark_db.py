@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Event loop responsiveness benchmark.
+Keeps N heavy requests (full order list) in flight and measures the latency of a
+light request at the same time. Run it against a running server before and after
+a change and compare the numbers.
+poetry run python scripts/benchmark_db.py --url http://localhost:8000 --username admin --password ...
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from bench_utils import print_latencies
+
+
+async def worker(client: httpx.AsyncClient, path: str, deadline: float, latencies: list[float]):
+	while time.perf_counter() < deadline:
+		start = time.perf_counter()
+		response = await client.get(path)
+		response.raise_for_status()
+		latencies.append(time.perf_counter() - start)
+
+
+async def main():
+	parser = argparse.ArgumentParser(description='Event loop responsiveness benchmark')
+	parser.add_argument('--url', default='http://localhost:8000')
+	parser.add_argument('--username', required=True)
+	parser.add_argument('--password', required=True)
+	parser.add_argument('--heavy', default='/api/v1/orders/get_all_orders')
+	parser.add_argument('--light', default='/api/v1/application/get_version')
+	parser.add_argument('--concurrency', type=int, default=20, help='Heavy requests in flight')
+	parser.add_argument('--duration', type=float, default=20.0, help='Seconds')
+	args = parser.parse_args()
+
+	limits = httpx.Limits(max_connections=args.concurrency + 1)
+	async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+		response = await client.post(
+			'/api/v1/auth/login', json={'username': args.username, 'password': args.password}
+		)
+		if response.status_code != 200:
+			print(f'❌ Login failed: {response.text}')
+			return
+
+		print(f'🚀 {args.concurrency} x {args.heavy} + 1 x {args.light} for {args.duration:.0f}s')
+		heavy, light = [], []
+		start = time.perf_counter()
+		deadline = start + args.duration
+		await asyncio.gather(
+			*(worker(client, args.heavy, deadline, heavy) for _ in range(args.concurrency)),
+			worker(client, args.light, deadline, light),
+		)
+		duration = time.perf_counter() - start
+
+		print_latencies('heavy', heavy, duration)
+		print_latencies('light', light, duration)
+
+		response = await client.get('/api/v1/application/get_db_pool_metrics')
+		if response.status_code == 200:
+			print(f'🔧 Pool: {response.json()}')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
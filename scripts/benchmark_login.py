@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Login burst benchmark.
+Fires waves of N simultaneous logins, like a shift change, and measures their
+latency and the latency of a light request running at the same time. Run it
+against a running server before and after a change and compare the numbers.
+Failed logins count towards the attempt limiter, so use valid credentials.
+poetry run python scripts/benchmark_login.py --url http://localhost:8000 --username admin --password ...
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from bench_utils import print_latencies
+
+
+async def login(client: httpx.AsyncClient, credentials: dict, latencies: list[float]):
+	start = time.perf_counter()
+	response = await client.post('/api/v1/auth/login', json=credentials)
+	response.raise_for_status()
+	latencies.append(time.perf_counter() - start)
+
+
+async def light_worker(client: httpx.AsyncClient, path: str, done: asyncio.Event, latencies: list):
+	while not done.is_set():
+		start = time.perf_counter()
+		response = await client.get(path)
+		response.raise_for_status()
+		latencies.append(time.perf_counter() - start)
+
+
+async def main():
+	parser = argparse.ArgumentParser(description='Login burst benchmark')
+	parser.add_argument('--url', default='http://localhost:8000')
+	parser.add_argument('--username', required=True)
+	parser.add_argument('--password', required=True)
+	parser.add_argument('--light', default='/api/v1/application/get_version')
+	parser.add_argument('--concurrency', type=int, default=30, help='Simultaneous logins')
+	parser.add_argument('--waves', type=int, default=5)
+	args = parser.parse_args()
+
+	credentials = {'username': args.username, 'password': args.password}
+	limits = httpx.Limits(max_connections=args.concurrency + 1)
+	async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+		response = await client.post('/api/v1/auth/login', json=credentials)
+		if response.status_code != 200:
+			print(f'❌ Login failed: {response.text}')
+			return
+
+		print(f'🚀 {args.waves} waves of {args.concurrency} logins + 1 x {args.light}')
+		logins, light = [], []
+		done = asyncio.Event()
+		light_task = asyncio.create_task(light_worker(client, args.light, done, light))
+		start = time.perf_counter()
+		for _ in range(args.waves):
+			await asyncio.gather(
+				*(login(client, credentials, logins) for _ in range(args.concurrency))
+			)
+		duration = time.perf_counter() - start
+		done.set()
+		await light_task
+
+		print_latencies('login', logins, duration)
+		print_latencies('light', light, duration)
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Middleware stack throughput benchmark.
+Sends authenticated requests to the application in process (no server, no
+network) through the whole middleware stack, Prometheus and GZip included, and
+reports requests per second. The `legacy` stack swaps AuthMiddleware for the
+previous BaseHTTPMiddleware pair (SafeRequestMiddleware + LoggingMiddleware) so
+before and after can be compared in one run.
+Run it from the project folder, it uses the usual config and database:
+poetry run python scripts/benchmark_middleware.py --duration 10 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from bench_utils import print_latencies
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, RedirectResponse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# The app resolves config/, app/templates... next to the entry script
+sys.argv[0] = str(ROOT / 'main.py')
+
+from app.core import SWAGGER_PATH, get_user, settings
+from app.core.build_app import create_application
+from app.core.middleware import AuthMiddleware
+from app.services import auth_manager
+
+
+class LegacySafeRequestMiddleware(BaseHTTPMiddleware):
+	"""SafeRequestMiddleware as it was before AuthMiddleware, for comparison."""
+
+	async def dispatch(self, request, call_next):
+		try:
+			return await call_next(request)
+		except Exception as e:
+			logging.error(f'[Middleware Error] {type(e).__name__}: {e}', exc_info=True)
+			return JSONResponse(
+				status_code=500,
+				content={
+					'message': str(e),
+					'error_type': type(e).__name__,
+					'path': request.url.path,
+				},
+			)
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+	"""LoggingMiddleware as it was before AuthMiddleware, for comparison."""
+
+	async def dispatch(self, request, call_next):
+		paths = ['/auth', '/api/v1/auth/login']
+		if request.url.path in paths or request.url.path.startswith('/static'):
+			return await call_next(request)
+		if get_user(request):
+			return await call_next(request)
+		if not request.url.path.startswith('/api'):
+			return RedirectResponse(url='/auth')
+		return JSONResponse(status_code=401, content={'error': 'Not logged in'})
+
+
+def use_stack(app, current: list[Middleware], name: str):
+	"""Rebuild the middleware stack of `app` with AuthMiddleware or the legacy pair."""
+	stack = []
+	for middleware in current:
+		if name == 'legacy' and middleware.cls is AuthMiddleware:
+			stack += [Middleware(LegacySafeRequestMiddleware), Middleware(LegacyLoggingMiddleware)]
+		else:
+			stack.append(middleware)
+	app.user_middleware = stack
+	app.middleware_stack = None
+
+
+async def worker(client: httpx.AsyncClient, paths: list[str], deadline: float, latencies: list):
+	i = 0
+	while time.perf_counter() < deadline:
+		start = time.perf_counter()
+		response = await client.get(paths[i % len(paths)])
+		response.raise_for_status()
+		latencies.append(time.perf_counter() - start)
+		i += 1
+
+
+async def run(app, args, name: str) -> float:
+	token = auth_manager.create_token({'user_id': 0, 'username': 'benchmark', 'roles': ['admin']})
+	transport = httpx.ASGITransport(app=app)
+	async with httpx.AsyncClient(
+		transport=transport,
+		base_url='http://benchmark',
+		cookies={'Authorization': f'Bearer {token}'},
+		headers={'Accept-Encoding': 'gzip'},
+	) as client:
+		warmup = []
+		await worker(client, args.paths, time.perf_counter() + 1, warmup)
+
+		latencies = []
+		start = time.perf_counter()
+		deadline = start + args.duration
+		await asyncio.gather(
+			*(worker(client, args.paths, deadline, latencies) for _ in range(args.concurrency))
+		)
+		duration = time.perf_counter() - start
+
+	return print_latencies(name, latencies, duration, digits=2)
+
+
+async def main():
+	parser = argparse.ArgumentParser(description='Middleware stack throughput benchmark')
+	parser.add_argument(
+		'--paths',
+		nargs='+',
+		default=['/api/v1/application/get_version', '/api/v1/application/get_current_settings'],
+		help='Routes requested in turn, prefer ones without database access',
+	)
+	parser.add_argument('--stack', choices=['current', 'legacy', 'both'], default='both')
+	parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight')
+	parser.add_argument('--duration', type=float, default=10.0, help='Seconds per stack')
+	args = parser.parse_args()
+
+	logging.disable(logging.INFO)
+	app = create_application(title=settings.TITLE, swagger_path=SWAGGER_PATH)
+	current = list(app.user_middleware)
+	names = ['legacy', 'current'] if args.stack == 'both' else [args.stack]
+
+	print(f'🚀 {args.concurrency} in flight on {", ".join(args.paths)} for {args.duration:.0f}s')
+	results = {}
+	for name in names:
+		use_stack(app, current, name)
+		print(f'🔧 {name}: {" > ".join(m.cls.__name__ for m in app.user_middleware)}')
+		results[name] = await run(app, args, name)
+
+	if len(results) == 2:
+		print(f'⚡ current / legacy: {results["current"] / results["legacy"]:.2f}x')
+
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Local mock of the Omie API (ListarPedidos, ListarProdutos, ListarClientes).
+Serves generated data with a per-request latency and a server-side rate
+limit, answering 429 (or Omie's MISUSE_API_PROCESS fault with --omie-faults)
+when it is exceeded, so sync throughput and the client's limiter and backoff
+can be tested offline. Like Omie, an empty page is a 500 Client-5113 fault,
+and a listing filtered by date (an incremental sync) only returns the newest
+--changed records.
+
+Serve it and point the app at it with "OMIE_BASE_URL": "http://127.0.0.1:8900/api/v1/":
+poetry run python scripts/mock_omie.py --orders 5000 --latency 0.3 --limit 4
+
+Or benchmark OmieClient directly against it with several concurrency levels:
+poetry run python scripts/mock_omie.py --bench 1 4 8 --rate-limit 4
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+FAMILIES = ['Zona A', 'Zona B', 'Zona C', 'Outros']
+
+
+def build_data(n_orders: int, n_products: int, n_clients: int, seed: int = 42) -> dict:
+	rng = random.Random(seed)
+	products = [
+		{
+			'codigo': f'PRD{i:04d}',
+			'descricao': f'Produto {i}',
+			'descricao_familia': rng.choice(FAMILIES),
+		}
+		for i in range(n_products)
+	]
+	clients = [
+		{
+			'codigo_cliente_omie': 1000 + i,
+			'razao_social': f'Cliente {i} Ltda',
+			'cnpj_cpf': f'{rng.randint(10, 99)}.{rng.randint(100, 999)}.{rng.randint(100, 999)}/0001-{i % 100:02d}',
+		}
+		for i in range(n_clients)
+	]
+	orders = [
+		{
+			'cabecalho': {
+				'numero_pedido': 100000 + i,
+				'codigo_cliente': rng.choice(clients)['codigo_cliente_omie'],
+				'etapa': rng.choice(['10', '20', '50', '60']),
+			},
+			'det': [
+				{'produto': {'codigo': rng.choice(products)['codigo']}}
+				for _ in range(rng.randint(1, 3))
+			],
+		}
+		for i in range(n_orders)
+	]
+	return {
+		'ListarProdutos': ('produto_servico_cadastro', products),
+		'ListarClientes': ('clientes_cadastro', clients),
+		'ListarPedidos': ('pedido_venda_produto', orders),
+	}
+
+
+def create_app(
+	data: dict, latency: float, limit: float, omie_faults: bool, changed: int = 0
+) -> FastAPI:
+	app = FastAPI()
+	stats = Counter()
+	window: list[float] = []
+
+	@app.post('/api/v1/{group}/{resource}/')
+	async def call(request: Request):
+		body = await request.json()
+		now = time.monotonic()
+		window[:] = [t for t in window if now - t < 1]
+		if limit and len(window) >= limit:
+			stats['throttled'] += 1
+			if omie_faults:
+				return JSONResponse(
+					status_code=500,
+					content={
+						'faultstring': 'ERROR: MISUSE_API_PROCESS',
+						'faultcode': 'SOAP-ENV:Client-8',
+					},
+				)
+			return JSONResponse(
+				status_code=429, content={'error': 'rate limited'}, headers={'Retry-After': '1'}
+			)
+		window.append(now)
+		stats['requests'] += 1
+
+		await asyncio.sleep(latency)
+		key, records = data[body['call']]
+		param = body['param'][0]
+		if 'filtrar_por_data_de' in param:
+			records = records[len(records) - changed :] if changed else []
+		page, per_page = param['pagina'], param['registros_por_pagina']
+		page_records = records[(page - 1) * per_page : page * per_page]
+		if not page_records:
+			stats['empty'] += 1
+			return JSONResponse(
+				status_code=500,
+				content={
+					'faultstring': f'ERROR: Não existem registros para a página [{page}]!',
+					'faultcode': 'SOAP-ENV:Client-5113',
+				},
+			)
+		return {
+			'pagina': page,
+			'total_de_paginas': -(-len(records) // per_page),
+			'registros': len(page_records),
+			'total_de_registros': len(records),
+			key: page_records,
+		}
+
+	@app.get('/stats')
+	async def get_stats():
+		return dict(stats)
+
+	app.state.stats = stats
+	return app
+
+
+def load_omie_client():
+	# Loaded by path: importing the app package would start the controller and its database
+	path = Path(__file__).resolve().parent.parent / 'app' / 'services' / 'controller' / 'omie.py'
+	spec = importlib.util.spec_from_file_location('omie_client', path)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module.OmieClient
+
+
+async def bench(app: FastAPI, port: int, args):
+	server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+	serve = asyncio.create_task(server.serve())
+	while not server.started:
+		await asyncio.sleep(0.05)
+
+	OmieClient = load_omie_client()
+	try:
+		for concurrency in args.bench:
+			app.state.stats.clear()
+			client = OmieClient(
+				'key',
+				'secret',
+				base_url=f'http://127.0.0.1:{port}/api/v1/',
+				concurrency=concurrency,
+				rate_limit=args.rate_limit,
+			)
+			start = time.perf_counter()
+			result = await client.get_orders_since(None)
+			duration = time.perf_counter() - start
+			stats = app.state.stats
+			print(
+				f'📊 concurrency={concurrency}: {result["total_items"]} items in {duration:.1f}s, '
+				f'{stats["requests"]} requests ({stats["requests"] / duration:.1f} req/s), '
+				f'{stats["throttled"]} throttled, complete={result["success"]}'
+			)
+	finally:
+		server.should_exit = True
+		await serve
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Mock Omie API')
+	parser.add_argument('--port', type=int, default=8900)
+	parser.add_argument('--orders', type=int, default=3000)
+	parser.add_argument('--products', type=int, default=300)
+	parser.add_argument('--clients', type=int, default=500)
+	parser.add_argument('--latency', type=float, default=0.3, help='Seconds per request')
+	parser.add_argument('--limit', type=float, default=4, help='Requests per second, 0 = none')
+	parser.add_argument('--omie-faults', action='store_true', help='Throttle like Omie (500 fault)')
+	parser.add_argument(
+		'--changed', type=int, default=0, help='Records returned when filtered by date'
+	)
+	parser.add_argument('--bench', type=int, nargs='*', help='Benchmark these concurrency levels')
+	parser.add_argument('--rate-limit', type=float, default=3, help='Client rate limit for --bench')
+	args = parser.parse_args()
+
+	data = build_data(args.orders, args.products, args.clients)
+	app = create_app(data, args.latency, args.limit, args.omie_faults, args.changed)
+	if args.bench:
+		asyncio.run(bench(app, args.port, args))
+	else:
+		print(f'🚀 Mock Omie on http://127.0.0.1:{args.port}/api/v1/ (stats at /stats)')
+		uvicorn.run(app, host='127.0.0.1', port=args.port)
+
+
+if __name__ == '__main__':
+	main()